@@ -1,8 +1,16 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, abort, render_template, request, jsonify, url_for
 import json
 import os
 from pathlib import Path
 
+from servicios import AlmacenRevistas
+from servicios.almacen_sqlite import REVISTAS_DB, AlmacenSQLite
+from servicios.catalogo_binario import REVISTAS_CATALOGO, AlmacenBinario
+from servicios.exportacion import EXPORTADORES, FORMATOS, filas_revistas
+from servicios.listados import ORDENES, paginar
+from servicios.metricas import Metricas
+from servicios.respuestas import RespuestasCacheadas, version_codigo
+
 app = Flask(__name__)
 
 # Cargar datos de revistas
@@ -10,85 +18,115 @@ BASE_DIR = Path(__file__).parent
 REVISTAS_JSON = BASE_DIR / 'datos' / 'json' / 'revistas.json'
 SCIMAGOJR_JSON = BASE_DIR / 'datos' / 'json' / 'revistas_scimagojr.json'
 
+# Con REVISTAS_BACKEND=sqlite los datos se leen de la base generada con
+# `python -m servicios.almacen_sqlite` (una conexión por hilo); con
+# REVISTAS_BACKEND=binario, del catálogo mapeado en memoria que genera
+# utils/generar_json_revistas.py (compartido entre procesos); si no, un
+# solo almacén en memoria por proceso, compartido por todos los hilos
+BACKEND = os.environ.get('REVISTAS_BACKEND')
+if BACKEND == 'sqlite':
+    almacen = AlmacenSQLite(os.environ.get('REVISTAS_DB', REVISTAS_DB))
+elif BACKEND == 'binario':
+    almacen = AlmacenBinario(os.environ.get('REVISTAS_CATALOGO', REVISTAS_CATALOGO))
+else:
+    almacen = AlmacenRevistas(REVISTAS_JSON, SCIMAGOJR_JSON)
+almacen.instantanea()
+
+# ETag de la versión de los datos, 304, compresión y caché de páginas
+# renderizadas; se vacía cuando se regeneran los datos
+cacheada = RespuestasCacheadas(almacen, version_codigo(BASE_DIR))
+
+# Con REVISTAS_METRICAS=1 se mide cada petición (carga de datos, filtrado y
+# render) y las métricas se publican en /metrics para Prometheus; sin la
+# variable no se registra nada y no hay costo por petición
+if os.environ.get('REVISTAS_METRICAS') == '1':
+    Metricas().instalar(app, almacen)
+
+# Número máximo de resultados que se muestran en /buscar
+LIMITE_BUSQUEDA = 500
+
+# Tamaño máximo de página en la API JSON
+LIMITE_API = 1000
+
+# Sugerencias por defecto del autocompletado
+SUGERENCIAS = 8
+
+# Letras iniciales que se ofrecen en /explorar
+LETRAS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
 def cargar_datos():
-    with open(REVISTAS_JSON, 'r', encoding='utf-8') as f:
-        revistas = json.load(f)
-    with open(SCIMAGOJR_JSON, 'r', encoding='utf-8') as f:
-        scimagojr = json.load(f)
-    return revistas, scimagojr
+    # Los datos se leen una vez y se recargan solo si los JSON cambian en disco
+    instantanea = almacen.instantanea()
+    return instantanea.revistas, instantanea.scimagojr
 
 # Rutas principales
 @app.route('/')
+@cacheada
 def index():
     return render_template('index.html')
 
 @app.route('/areas')
+@cacheada
 def areas():
-    revistas, scimagojr = cargar_datos()
-    # Obtener lista única de áreas
-    areas = set()
-    for revista in revistas.values():
-        areas.update(revista['areas'])
-    return render_template('areas.html', areas=sorted(areas))
+    indices = almacen.instantanea().indices
+    # Lista única de áreas precalculada en el índice
+    return render_template('areas.html', areas=indices.areas, conteos=indices.conteo_areas)
 
 @app.route('/area/<area>')
+@cacheada
 def area_detalle(area):
-    revistas, scimagojr = cargar_datos()
-    # Filtrar revistas por área
-    revistas_area = {
-        titulo: info for titulo, info in revistas.items()
-        if area in info['areas']
-    }
-    return render_template('area_detalle.html', area=area, revistas=revistas_area, scimagojr=scimagojr)
+    indices = almacen.instantanea().indices
+    if area not in indices.conteo_areas:
+        abort(404)
+    # Las filas se cargan desde /api/area/<area> con DataTables en modo servidor
+    return render_template('area_detalle.html', area=area, total=indices.conteo_areas[area])
 
 @app.route('/catalogos')
+@cacheada
 def catalogos():
-    revistas, _ = cargar_datos()
-    # Obtener lista única de catálogos
-    catalogos = set()
-    for revista in revistas.values():
-        catalogos.update(revista['catalogos'])
-    return render_template('catalogos.html', catalogos=sorted(catalogos))
+    indices = almacen.instantanea().indices
+    # Lista única de catálogos precalculada en el índice
+    return render_template('catalogos.html', catalogos=indices.catalogos, conteos=indices.conteo_catalogos)
 
 @app.route('/catalogo/<catalogo>')
+@cacheada
 def catalogo_detalle(catalogo):
-    revistas, scimagojr = cargar_datos()
-    # Filtrar revistas por catálogo
-    revistas_catalogo = {
-        titulo: info for titulo, info in revistas.items()
-        if catalogo in info['catalogos']
-    }
-    return render_template('catalogo_detalle.html', catalogo=catalogo, revistas=revistas_catalogo, scimagojr=scimagojr)
+    indices = almacen.instantanea().indices
+    if catalogo not in indices.conteo_catalogos:
+        abort(404)
+    # Las filas se cargan desde /api/catalogo/<catalogo> con DataTables en modo servidor
+    return render_template('catalogo_detalle.html', catalogo=catalogo,
+                           total=indices.conteo_catalogos[catalogo])
 
 @app.route('/explorar')
+@cacheada
 def explorar():
-    return render_template('explorar.html')
+    return render_template('explorar.html', letras=LETRAS)
 
 @app.route('/explorar/<letra>')
+@cacheada
 def explorar_letra(letra):
-    revistas, scimagojr = cargar_datos()
-    # Filtrar revistas por letra inicial
-    revistas_letra = {
-        titulo: info for titulo, info in revistas.items()
-        if titulo.lower().startswith(letra.lower())
-    }
-    return render_template('explorar_letra.html', letra=letra, revistas=revistas_letra, scimagojr=scimagojr)
+    indices = almacen.instantanea().indices
+    # Las filas se cargan desde /api/letra/<letra> con DataTables en modo servidor
+    return render_template('explorar_letra.html', letra=letra, total=indices.conteo_letra(letra))
 
 @app.route('/buscar')
+@cacheada
 def buscar():
     query = request.args.get('q', '').lower()
     if not query:
         return render_template('buscar.html', revistas={})
     
-    revistas, scimagojr = cargar_datos()
-    # Buscar revistas que contengan la consulta
-    resultados = {
-        titulo: info for titulo, info in revistas.items()
-        if query in titulo.lower()
-    }
-    return render_template('buscar.html', revistas=resultados, scimagojr=scimagojr, query=query)
+    instantanea = almacen.instantanea()
+    revistas = instantanea.revistas
+    # Buscar en el índice invertido; los títulos vienen ordenados por relevancia
+    titulos, total = instantanea.busqueda.buscar(query, LIMITE_BUSQUEDA)
+    resultados = {titulo: revistas[titulo] for titulo in titulos}
+    return render_template('buscar.html', revistas=resultados, scimagojr=instantanea.scimagojr,
+                           query=query, total=total)
 
 @app.route('/revista/<titulo>')
+@cacheada
 def revista_detalle(titulo):
     revistas, scimagojr = cargar_datos()
     revista_info = revistas.get(titulo, {})
@@ -98,7 +136,189 @@ def revista_detalle(titulo):
                          revista=revista_info, 
                          scimagojr=scimagojr_info)
 
+# API JSON
+def parametros_listado():
+    """Lee paginación, orden y filtro; acepta también los parámetros de DataTables."""
+    args = request.args
+    offset = max(args.get('offset', args.get('start', 0, type=int), type=int), 0)
+    limite = args.get('limit', args.get('length', 25, type=int), type=int)
+    if limite < 0 or limite > LIMITE_API:
+        # DataTables envía -1 para "todos"
+        limite = LIMITE_API
+
+    orden = args.get('orden')
+    direccion = args.get('dir')
+    columna = args.get('order[0][column]')
+    if columna is not None:
+        orden = args.get(f'columns[{columna}][data]', orden)
+        direccion = args.get('order[0][dir]', direccion)
+    if orden not in ORDENES:
+        orden = None
+    if direccion in ('asc', 'desc'):
+        descendente = direccion == 'desc'
+    else:
+        descendente = orden != 'titulo'
+
+    filtro = args.get('filtro', args.get('search[value]', '')).strip()
+    return offset, limite, orden, descendente, filtro
+
+def respuesta_listado(instantanea, pagina, total, filtrados, **extra):
+    """Devuelve una página de títulos en formato DataTables."""
+    listados = instantanea.listados
+    return jsonify({
+        **extra,
+        'draw': request.args.get('draw', 0, type=int),
+        'recordsTotal': total,
+        'recordsFiltered': filtrados,
+        'data': [
+            dict(listados.fila(titulo), url=url_for('revista_detalle', titulo=titulo))
+            for titulo in pagina
+        ],
+    })
+
+def listado_api(tipo, valor):
+    instantanea = almacen.instantanea()
+    offset, limite, orden, descendente, filtro = parametros_listado()
+    resultado = instantanea.listados.pagina(tipo, valor, orden or 'h_index', descendente,
+                                            offset, limite, filtro)
+    if resultado is None:
+        return jsonify({'error': f'No existe {tipo} {valor}'}), 404
+    pagina, total, filtrados = resultado
+    return respuesta_listado(instantanea, pagina, total, filtrados)
+
+@app.route('/api/area/<area>')
+@cacheada
+def api_area(area):
+    return listado_api('area', area)
+
+@app.route('/api/catalogo/<catalogo>')
+@cacheada
+def api_catalogo(catalogo):
+    return listado_api('catalogo', catalogo)
+
+@app.route('/api/letra/<letra>')
+@cacheada
+def api_letra(letra):
+    return listado_api('letra', letra)
+
+@app.route('/api/buscar')
+@cacheada
+def api_buscar():
+    instantanea = almacen.instantanea()
+    offset, limite, orden, descendente, filtro = parametros_listado()
+    # Sin parámetro de orden se conserva el orden de relevancia
+    titulos, total = instantanea.busqueda.buscar(request.args.get('q', ''))
+    if orden == 'h_index':
+        titulos = instantanea.listados.ordenar_por_h(titulos, descendente)
+    elif orden == 'titulo':
+        titulos = sorted(titulos, reverse=descendente)
+    coincidencias = instantanea.busqueda.coincidencias(filtro) if filtro else None
+    pagina, filtrados = paginar(titulos, offset, limite, coincidencias)
+    return respuesta_listado(instantanea, pagina, total, filtrados)
+
+@app.route('/api/suggest')
+@cacheada
+def api_suggest():
+    # Se llama en cada tecla: prefijo de cualquier palabra del título, por H-Index
+    instantanea = almacen.instantanea()
+    listados = instantanea.listados
+    consulta = request.args.get('q', '')
+    n = max(request.args.get('n', SUGERENCIAS, type=int), 0)
+    return jsonify({
+        'q': consulta,
+        'sugerencias': [
+            {
+                'titulo': titulo,
+                'h_index': listados.fila(titulo)['h_index'],
+                'url': url_for('revista_detalle', titulo=titulo),
+            }
+            for titulo in instantanea.sugerencias.sugerir(consulta, n)
+        ],
+    })
+
+@app.route('/api/top')
+@cacheada
+def api_top():
+    # ?area=ING&k=10, ?catalogo=SCOPUS o, sin filtro, el catálogo completo
+    instantanea = almacen.instantanea()
+    listados = instantanea.listados
+    k = min(max(request.args.get('k', 10, type=int), 0), LIMITE_API)
+    if 'area' in request.args:
+        tipo, valor = 'area', request.args['area']
+    elif 'catalogo' in request.args:
+        tipo, valor = 'catalogo', request.args['catalogo']
+    else:
+        tipo, valor = 'todas', None
+    # Los rankings están precalculados: la respuesta no depende del tamaño del listado
+    titulos = listados.top(tipo, valor, k)
+    if titulos is None:
+        return jsonify({'error': f'No existe {tipo} {valor}'}), 404
+    return jsonify({
+        'tipo': tipo,
+        'valor': valor,
+        'k': k,
+        'data': [
+            dict(listados.fila(titulo), url=url_for('revista_detalle', titulo=titulo))
+            for titulo in titulos
+        ],
+    })
+
+@app.route('/api/facetas')
+@cacheada
+def api_facetas():
+    # p. ej. ?area=ING&catalogo=SCOPUS&catalogo=JCR&h_min=50&q=materials
+    # Los valores repetidos de una faceta se combinan con OR y las facetas con AND
+    instantanea = almacen.instantanea()
+    offset, limite, orden, descendente, filtro = parametros_listado()
+    args = request.args
+    facetas = instantanea.facetas
+    resultado, conteos = facetas.consultar(
+        areas=args.getlist('area'),
+        catalogos=args.getlist('catalogo'),
+        h_min=args.get('h_min', type=int),
+        h_max=args.get('h_max', type=int),
+        letra=args.get('letra', '').strip(),
+        texto=args.get('q', '').strip(),
+    )
+    titulos = facetas.ordenados(resultado, orden or 'h_index', descendente)
+    coincidencias = instantanea.busqueda.coincidencias(filtro) if filtro else None
+    pagina, filtrados = paginar(titulos, offset, limite, coincidencias)
+    return respuesta_listado(instantanea, pagina, len(titulos), filtrados, facetas=conteos)
+
+# Exportación: las filas se generan y se envían sin armar la respuesta completa
+def exportar_listado(tipo, valor=None):
+    formato = request.args.get('formato', 'csv')
+    if formato not in EXPORTADORES:
+        return jsonify({'error': f'Formato no soportado: {formato}'}), 400
+    instantanea = almacen.instantanea()
+    _, _, orden, descendente, filtro = parametros_listado()
+    titulos = instantanea.listados.ordenados(tipo, valor, orden or 'h_index', descendente)
+    if titulos is None:
+        return jsonify({'error': f'No existe {tipo} {valor}'}), 404
+    if filtro:
+        coincidencias = instantanea.busqueda.coincidencias(filtro)
+        titulos = (t for t in titulos if t in coincidencias)
+
+    filas = filas_revistas(instantanea, titulos)
+    respuesta = Response(EXPORTADORES[formato](filas), mimetype=FORMATOS[formato])
+    nombre = f'revistas-{valor}.{formato}' if valor is not None else f'revistas.{formato}'
+    respuesta.headers.set('Content-Disposition', 'attachment', filename=nombre)
+    return respuesta
+
+@app.route('/exportar')
+def exportar_todas():
+    return exportar_listado('todas')
+
+@app.route('/exportar/area/<area>')
+def exportar_area(area):
+    return exportar_listado('area', area)
+
+@app.route('/exportar/catalogo/<catalogo>')
+def exportar_catalogo(catalogo):
+    return exportar_listado('catalogo', catalogo)
+
 @app.route('/creditos')
+@cacheada
 def creditos():
     return render_template('creditos.html')
 
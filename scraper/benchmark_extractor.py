@@ -0,0 +1,72 @@
+"""
+Compara la velocidad de los extractores sobre páginas de SCImago guardadas.
+
+Uso:
+    python scraper/descargar_muestras.py -n 20
+    python scraper/benchmark_extractor.py --paginas datos/html_muestras
+
+Cada archivo .html del directorio debe ser una página de revista de
+SCImago; descargar_muestras.py las obtiene a partir de las URL de
+revistas_scimagojr.json. Además del tiempo por página, se verifica que cada extractor
+devuelva los mismos datos que la implementación original ('legado').
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from extractor import EXTRACTORES, HAY_LXML, obtener_extractor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGINAS_DIR = os.path.join(BASE_DIR, 'datos', 'html_muestras')
+
+
+def medir(extractor, paginas, repeticiones):
+    """Devuelve (segundos por página, resultados de la última repetición)."""
+    resultados = []
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultados = [extractor.datos_revista(html, ruta.name) for ruta, html in paginas]
+    total = time.perf_counter() - inicio
+    return total / (repeticiones * len(paginas)), resultados
+
+
+def main():
+    disponibles = [n for n in EXTRACTORES if n != 'lxml' or HAY_LXML]
+    parser = argparse.ArgumentParser(description='Benchmark de extractores de páginas de SCImago')
+    parser.add_argument('--paginas', default=PAGINAS_DIR, help='Directorio con páginas .html guardadas')
+    parser.add_argument('--repeticiones', type=int, default=5, help='Veces que se procesa cada página (default: 5)')
+    parser.add_argument('--extractores', nargs='+', default=disponibles, choices=list(EXTRACTORES),
+                        help='Extractores a comparar (default: todos los disponibles)')
+    args = parser.parse_args()
+
+    rutas = sorted(Path(args.paginas).glob('*.html'))
+    if not rutas:
+        print(f"No hay páginas .html en {args.paginas}; descárgalas con: "
+              f"python scraper/descargar_muestras.py --salida {args.paginas}")
+        sys.exit(1)
+    paginas = [(ruta, ruta.read_text(encoding='utf-8', errors='replace')) for ruta in rutas]
+    print(f"Páginas: {len(paginas)}, repeticiones: {args.repeticiones}")
+
+    referencia_nombre = 'legado'
+    _, referencia = medir(obtener_extractor(referencia_nombre), paginas, 1)
+
+    tiempos = {}
+    for nombre in args.extractores:
+        por_pagina, resultados = medir(obtener_extractor(nombre), paginas, args.repeticiones)
+        tiempos[nombre] = por_pagina
+        diferencias = sum(1 for a, b in zip(resultados, referencia) if a != b)
+        print(f"{nombre:>8}: {por_pagina * 1000:8.2f} ms/página, "
+              f"{diferencias} páginas con datos distintos a '{referencia_nombre}'")
+
+    if referencia_nombre in tiempos:
+        base = tiempos[referencia_nombre]
+        for nombre, por_pagina in tiempos.items():
+            if nombre != referencia_nombre:
+                print(f"{nombre} es {base / por_pagina:.1f}x más rápido que {referencia_nombre}")
+
+
+if __name__ == '__main__':
+    main()
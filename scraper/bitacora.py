@@ -0,0 +1,111 @@
+"""
+Bitácora de progreso del scraper.
+
+Cada revista extraída se agrega como una línea JSON al final de un archivo
+(JSON Lines), de modo que guardar una revista cuesta O(1) sin importar
+cuántas se llevan. Al compactar, el contenido se combina con el JSON
+principal, se escribe en un archivo temporal y se reemplaza el original con
+un renombrado atómico; después se vacía la bitácora.
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+
+def escribir_json_atomico(ruta, data, indent=4):
+    """Escribe `data` en `ruta` sin dejar nunca un archivo a medio escribir."""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=directorio)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+class BitacoraProgreso:
+    """Datos ya extraídos más una bitácora de solo agregado con las nuevas revistas."""
+
+    def __init__(self, ruta_json, ruta_bitacora, ruta_respaldo=None):
+        self.ruta_json = ruta_json
+        self.ruta_bitacora = ruta_bitacora
+        self.ruta_respaldo = ruta_respaldo
+        self.datos = {}
+        self.pendientes = 0
+        self._lock = threading.Lock()
+        self._archivo = None
+
+    def cargar(self):
+        """Lee el JSON compactado y reaplica la bitácora encima. Devuelve los datos."""
+        if os.path.exists(self.ruta_json):
+            with open(self.ruta_json, 'r', encoding='utf-8') as f:
+                self.datos = json.load(f)
+        elif self.ruta_respaldo and os.path.exists(self.ruta_respaldo):
+            with open(self.ruta_respaldo, 'r', encoding='utf-8') as f:
+                self.datos = json.load(f)
+
+        self.pendientes = 0
+        if os.path.exists(self.ruta_bitacora):
+            self._recortar_linea_incompleta()
+            with open(self.ruta_bitacora, 'r', encoding='utf-8') as f:
+                for linea in f:
+                    try:
+                        registro = json.loads(linea)
+                    except ValueError:
+                        # Última línea truncada por un corte abrupto: se descarta
+                        continue
+                    self.datos[registro['titulo']] = registro['datos']
+                    self.pendientes += 1
+        return self.datos
+
+    def _recortar_linea_incompleta(self):
+        """Elimina una última línea sin salto final para que los nuevos registros no se peguen a ella."""
+        with open(self.ruta_bitacora, 'rb+') as f:
+            contenido = f.read()
+            if contenido and not contenido.endswith(b'\n'):
+                f.truncate(contenido.rfind(b'\n') + 1)
+
+    def __contains__(self, titulo):
+        return titulo in self.datos
+
+    def __len__(self):
+        return len(self.datos)
+
+    def registrar(self, titulo, datos):
+        """Agrega una revista a la bitácora y la sincroniza a disco."""
+        linea = json.dumps({'titulo': titulo, 'datos': datos}, ensure_ascii=False)
+        with self._lock:
+            if self._archivo is None:
+                self._archivo = open(self.ruta_bitacora, 'a', encoding='utf-8')
+            self._archivo.write(linea + '\n')
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+            self.datos[titulo] = datos
+            self.pendientes += 1
+
+    def compactar(self):
+        """Vuelca todos los datos al JSON principal y vacía la bitácora."""
+        with self._lock:
+            escribir_json_atomico(self.ruta_json, self.datos)
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
+            # Solo se borra la bitácora cuando el JSON ya quedó reemplazado
+            if os.path.exists(self.ruta_bitacora):
+                os.remove(self.ruta_bitacora)
+            self.pendientes = 0
+
+    def cerrar(self):
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
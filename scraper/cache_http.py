@@ -0,0 +1,105 @@
+"""
+Caché en disco de las respuestas HTTP del scraper.
+
+El contenido de cada respuesta se guarda una sola vez bajo el hash SHA-256
+de sus bytes (objetos/), y cada URL tiene una entrada pequeña (urls/) con el
+hash del contenido, ETag, Last-Modified y la hora de descarga. Mientras la
+entrada no supere el TTL se usa sin tocar la red; después se revalida con
+If-None-Match / If-Modified-Since y un 304 solo renueva la entrada.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+class RespuestaCache:
+    """Respuesta leída del caché con la misma interfaz mínima que requests.Response."""
+
+    def __init__(self, url, content, encoding, status_code=200):
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+        self.status_code = status_code
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+def _hash(texto):
+    return hashlib.sha256(texto).hexdigest()
+
+
+def _escribir_atomico(ruta, datos):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix='.tmp_', dir=os.path.dirname(ruta))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(datos)
+    os.replace(temporal, ruta)
+
+
+class CacheHTTP:
+    """Caché direccionado por contenido con TTL y revalidación condicional."""
+
+    def __init__(self, directorio, ttl=7 * 24 * 3600):
+        self.directorio = directorio
+        self.ttl = ttl
+
+    def _ruta_url(self, url):
+        h = _hash(url.encode('utf-8'))
+        return os.path.join(self.directorio, 'urls', h[:2], h + '.json')
+
+    def _ruta_objeto(self, h):
+        return os.path.join(self.directorio, 'objetos', h[:2], h)
+
+    def entrada(self, url):
+        """Metadatos guardados para la URL, o None si no está en caché."""
+        try:
+            with open(self._ruta_url(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def vigente(self, entrada):
+        return time.time() - entrada['guardado'] < self.ttl
+
+    def respuesta(self, url, entrada):
+        """Construye la respuesta a partir del contenido guardado; None si falta el objeto."""
+        try:
+            with open(self._ruta_objeto(entrada['contenido']), 'rb') as f:
+                return RespuestaCache(url, f.read(), entrada.get('encoding'))
+        except FileNotFoundError:
+            return None
+
+    def cabeceras_revalidacion(self, entrada):
+        cabeceras = {}
+        if entrada.get('etag'):
+            cabeceras['If-None-Match'] = entrada['etag']
+        if entrada.get('last_modified'):
+            cabeceras['If-Modified-Since'] = entrada['last_modified']
+        return cabeceras
+
+    def renovar(self, url, entrada):
+        """Marca como fresca una entrada tras recibir 304 Not Modified."""
+        entrada = dict(entrada, guardado=time.time())
+        _escribir_atomico(self._ruta_url(url), json.dumps(entrada).encode('utf-8'))
+
+    def guardar(self, url, response):
+        """Guarda una respuesta 200 de requests."""
+        contenido = response.content
+        h = _hash(contenido)
+        ruta_objeto = self._ruta_objeto(h)
+        if not os.path.exists(ruta_objeto):
+            _escribir_atomico(ruta_objeto, contenido)
+        entrada = {
+            'url': url,
+            'contenido': h,
+            'encoding': response.encoding or response.apparent_encoding,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'guardado': time.time(),
+        }
+        _escribir_atomico(self._ruta_url(url), json.dumps(entrada).encode('utf-8'))
@@ -0,0 +1,175 @@
+"""
+Cola de trabajo compartida para repartir el scraping entre procesos.
+
+La cola es una base SQLite (modo WAL) con una fila por revista. Cada
+trabajador toma un lote de títulos con un arrendamiento que vence a los
+`duracion_lease` segundos y lo renueva con latidos mientras trabaja. Si un
+trabajador se detiene o se cae, sus títulos vuelven a estar disponibles en
+cuanto vence el arrendamiento, sin llevar rangos a mano. Los resultados se
+guardan en la misma cola y el coordinador los vuelca a la bitácora.
+
+Sirve para varios procesos en la misma máquina o en varias que compartan el
+archivo en un sistema de archivos con bloqueos que funcionen.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+PENDIENTE = 'pendiente'
+ASIGNADO = 'asignado'
+HECHO = 'hecho'
+FALLIDO = 'fallido'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    titulo TEXT PRIMARY KEY,
+    indice INTEGER NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    trabajador TEXT,
+    vence REAL,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    datos TEXT,
+    volcado INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS trabajos_estado ON trabajos(estado, indice);
+"""
+
+
+def id_trabajador():
+    """Identificador único del proceso: máquina y PID."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ColaTrabajo:
+    """Cola de títulos con arrendamientos, latidos y reasignación de trabajos vencidos."""
+
+    def __init__(self, ruta, duracion_lease=120.0, max_intentos=3):
+        self.ruta = ruta
+        self.duracion_lease = duracion_lease
+        self.max_intentos = max_intentos
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+        # Una conexión por objeto, protegida con un lock para el hilo de latidos
+        self._con = sqlite3.connect(ruta, timeout=30, isolation_level=None, check_same_thread=False)
+        self._con.execute('PRAGMA journal_mode = WAL')
+        self._con.execute('PRAGMA busy_timeout = 30000')
+        self._con.executescript(ESQUEMA)
+        self._lock = threading.Lock()
+
+    def _transaccion(self, funcion):
+        """Ejecuta funcion(con) dentro de BEGIN IMMEDIATE (escritura exclusiva)."""
+        with self._lock:
+            self._con.execute('BEGIN IMMEDIATE')
+            try:
+                resultado = funcion(self._con)
+            except BaseException:
+                self._con.execute('ROLLBACK')
+                raise
+            self._con.execute('COMMIT')
+            return resultado
+
+    def sembrar(self, titulos):
+        """Agrega (titulo, indice) nuevos; los que ya estaban conservan su estado."""
+        titulos = list(titulos)
+        return self._transaccion(lambda con: con.executemany(
+            'INSERT OR IGNORE INTO trabajos (titulo, indice) VALUES (?, ?)', titulos).rowcount)
+
+    def arrendar(self, trabajador, cantidad=1):
+        """Asigna hasta `cantidad` títulos pendientes o con arrendamiento vencido."""
+        def arrendar(con):
+            ahora = time.time()
+            # Un título cuyo arrendamiento venció sin completar ni fallar (el
+            # trabajador se cayó o se colgó) cuenta como un intento fallido; si ya
+            # agotó sus intentos no se vuelve a repartir
+            con.execute(
+                'UPDATE trabajos SET estado = ?, error = ?, vence = NULL '
+                'WHERE estado = ? AND vence < ? AND intentos >= ?',
+                (FALLIDO, 'arrendamiento vencido', ASIGNADO, ahora, self.max_intentos))
+            filas = con.execute(
+                'SELECT titulo, indice FROM trabajos '
+                'WHERE estado = ? OR (estado = ? AND vence < ? AND intentos < ?) ORDER BY indice LIMIT ?',
+                (PENDIENTE, ASIGNADO, ahora, self.max_intentos, cantidad)).fetchall()
+            con.executemany(
+                'UPDATE trabajos SET estado = ?, trabajador = ?, vence = ?, intentos = intentos + 1 '
+                'WHERE titulo = ?',
+                [(ASIGNADO, trabajador, ahora + self.duracion_lease, titulo) for titulo, _ in filas])
+            return filas
+        return self._transaccion(arrendar)
+
+    def latido(self, trabajador):
+        """Renueva los arrendamientos vigentes del trabajador."""
+        return self._transaccion(lambda con: con.execute(
+            'UPDATE trabajos SET vence = ? WHERE estado = ? AND trabajador = ?',
+            (time.time() + self.duracion_lease, ASIGNADO, trabajador)).rowcount)
+
+    def completar(self, titulo, datos):
+        """Registra el resultado; datos None indica que la revista no está en SCImago."""
+        texto = json.dumps(datos, ensure_ascii=False) if datos is not None else None
+        self._transaccion(lambda con: con.execute(
+            'UPDATE trabajos SET estado = ?, datos = ?, error = NULL, vence = NULL WHERE titulo = ?',
+            (HECHO, texto, titulo)))
+
+    def fallar(self, titulo, error):
+        """Devuelve el título a la cola o lo marca como fallido si agotó sus intentos."""
+        self._transaccion(lambda con: con.execute(
+            'UPDATE trabajos SET estado = CASE WHEN intentos >= ? THEN ? ELSE ? END, '
+            'error = ?, vence = NULL WHERE titulo = ? AND estado = ?',
+            (self.max_intentos, FALLIDO, PENDIENTE, str(error), titulo, ASIGNADO)))
+
+    def resultados_nuevos(self):
+        """Resultados aún no volcados a la bitácora, como (titulo, datos)."""
+        with self._lock:
+            filas = self._con.execute(
+                'SELECT titulo, datos FROM trabajos WHERE estado = ? AND volcado = 0 AND datos IS NOT NULL',
+                (HECHO,)).fetchall()
+        return [(titulo, json.loads(datos)) for titulo, datos in filas]
+
+    def marcar_volcados(self, titulos):
+        titulos = [(t,) for t in titulos]
+        self._transaccion(lambda con: con.executemany(
+            'UPDATE trabajos SET volcado = 1 WHERE titulo = ?', titulos))
+
+    def resumen(self):
+        """Número de títulos en cada estado."""
+        with self._lock:
+            conteos = dict(self._con.execute('SELECT estado, count(*) FROM trabajos GROUP BY estado'))
+        return {estado: conteos.get(estado, 0) for estado in (PENDIENTE, ASIGNADO, HECHO, FALLIDO)}
+
+    def terminada(self):
+        """True cuando no queda nada pendiente ni asignado."""
+        resumen = self.resumen()
+        return resumen[PENDIENTE] == 0 and resumen[ASIGNADO] == 0
+
+    def cerrar(self):
+        with self._lock:
+            self._con.close()
+
+
+class Latidos:
+    """Hilo que renueva los arrendamientos de un trabajador cada tercio del plazo."""
+
+    def __init__(self, cola, trabajador):
+        self.cola = cola
+        self.trabajador = trabajador
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._latir, daemon=True)
+
+    def _latir(self):
+        while not self._parar.wait(self.cola.duracion_lease / 3):
+            try:
+                self.cola.latido(self.trabajador)
+            except sqlite3.Error as e:
+                print(f"Error al renovar arrendamientos: {e}")
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._hilo.join()
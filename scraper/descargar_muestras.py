@@ -0,0 +1,87 @@
+"""
+Descarga páginas de revistas de SCImago para el benchmark de extractores.
+
+Toma las URL de revistas_scimagojr.json, elige N repartidas a lo largo del
+catálogo (siempre las mismas) y guarda cada página como <sid>.html en el
+directorio de muestras. Usa el mismo cliente HTTP que el scraper, con su
+límite de tasa y su caché de páginas: las que ya se descargaron al hacer
+scraping se toman del caché sin volver a pedirlas.
+
+Uso:
+    python scraper/descargar_muestras.py -n 20
+    python scraper/benchmark_extractor.py
+"""
+
+import argparse
+import json
+import os
+import sys
+from urllib.parse import parse_qs, urlparse
+
+from cache_http import CacheHTTP
+from red import ClienteHTTP, ErrorHTTP, SinConexion
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCIMAGOJR_JSON = os.path.join(BASE_DIR, 'datos', 'json', 'revistas_scimagojr.json')
+CACHE_DIR = os.path.join(BASE_DIR, 'datos', 'cache_http')
+PAGINAS_DIR = os.path.join(BASE_DIR, 'datos', 'html_muestras')
+
+
+def urls_muestra(ruta_scimagojr, cantidad):
+    """URL de `cantidad` revistas repartidas a lo largo del catálogo, en orden de título."""
+    with open(ruta_scimagojr, 'r', encoding='utf-8') as f:
+        revistas = json.load(f)
+    urls = [datos['url'] for _, datos in sorted(revistas.items())
+            if isinstance(datos, dict) and datos.get('url')]
+    if len(urls) <= cantidad:
+        return urls
+    paso = len(urls) / cantidad
+    return [urls[int(i * paso)] for i in range(cantidad)]
+
+
+def nombre_archivo(url):
+    """'...journalsearch.php?q=21100201522&tip=sid' -> '21100201522.html'."""
+    sid = parse_qs(urlparse(url).query).get('q', [''])[0]
+    if not sid.isdigit():
+        return None
+    return f'{sid}.html'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Descarga páginas de SCImago para el benchmark de extractores')
+    parser.add_argument('-n', '--cantidad', type=int, default=20, help='Páginas a descargar (default: 20)')
+    parser.add_argument('--salida', default=PAGINAS_DIR, help=f'Directorio de las páginas (default: {PAGINAS_DIR})')
+    parser.add_argument('--scimagojr', default=SCIMAGOJR_JSON, help='JSON con las URL de las revistas')
+    parser.add_argument('--tasa', type=float, default=1.0, help='Peticiones por segundo a ScimagoJR (default: 1.0)')
+    parser.add_argument('--sin-red', action='store_true', help='Usar solo páginas en caché, sin conectarse a ScimagoJR')
+    args = parser.parse_args()
+
+    cliente = ClienteHTTP(concurrencia=1, tasa=args.tasa, cache=CacheHTTP(CACHE_DIR), sin_red=args.sin_red)
+    os.makedirs(args.salida, exist_ok=True)
+
+    guardadas = 0
+    for url in urls_muestra(args.scimagojr, args.cantidad):
+        nombre = nombre_archivo(url)
+        if nombre is None:
+            continue
+        ruta = os.path.join(args.salida, nombre)
+        if os.path.exists(ruta):
+            guardadas += 1
+            continue
+        try:
+            contenido = cliente.get(url).content
+        except (ErrorHTTP, SinConexion, OSError) as e:
+            print(f"No se pudo obtener {url}: {e}")
+            continue
+        with open(ruta, 'wb') as f:
+            f.write(contenido)
+        guardadas += 1
+        print(f"Guardada {ruta}")
+
+    print(f"Páginas en {args.salida}: {guardadas}")
+    if not guardadas:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
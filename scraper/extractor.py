@@ -0,0 +1,266 @@
+"""
+Extractores de datos de las páginas de SCImago.
+
+Hay tres implementaciones intercambiables que devuelven el mismo diccionario:
+
+- lxml:   parser en C y un solo recorrido por los h2 de la página.
+- bs4:    BeautifulSoup (con el parser lxml si está instalado) y un solo
+          recorrido por los h2.
+- legado: la implementación original, con una búsqueda completa del
+          documento por cada campo. Se conserva como referencia para el
+          benchmark y por si alguna página no la entiende otro extractor.
+
+obtener_extractor() elige el más rápido disponible.
+
+Las métricas se guardan tipadas desde la extracción: 'h_index' como entero,
+'issns' como lista de ISSN con guion y 'categorias' como lista de áreas y
+categorías. 'issn' y 'subject_area_category' conservan el texto de la página
+para mostrarlo tal cual.
+"""
+
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    HAY_LXML = True
+except ImportError:
+    HAY_LXML = False
+
+SCIMAGO_BASE_URL = 'https://www.scimagojr.com'
+
+# Texto que identifica cada h2 y la clave que ocupa en el resultado
+CAMPOS_H2 = (
+    ('H-Index', 'h_index'),
+    ('Publisher', 'publisher'),
+    ('ISSN', 'issn'),
+    ('Publication type', 'publication_type'),
+)
+SUBJECT_AREA = 'Subject Area and Category'
+
+# "15734919", "1573-4919" o "1573491X"
+_ISSN = re.compile(r'\b(\d{4})-?(\d{3}[\dXx])\b')
+
+
+def resultado_vacio(url):
+    return {
+        "site": None,
+        "h_index": None,
+        "subject_area_category": None,
+        "publisher": None,
+        "issn": None,
+        "widget": None,
+        "publication_type": None,
+        "url": url,
+        "issns": [],
+        "categorias": [],
+    }
+
+
+def entero(texto):
+    """Entero del texto o None si falta o no es numérico."""
+    try:
+        return int(str(texto).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def lista_issn(texto):
+    """'15734919, 0300577X' -> ['1573-4919', '0300-577X']"""
+    return [f"{a}-{b.upper()}" for a, b in _ISSN.findall(texto or '')]
+
+
+def tipar_metricas(datos, categorias=None):
+    """Convierte las métricas de texto a sus tipos: H-Index entero y listas de ISSN y categorías."""
+    datos['h_index'] = entero(datos.get('h_index'))
+    datos['issns'] = lista_issn(datos.get('issn'))
+    if categorias is not None:
+        datos['categorias'] = list(categorias)
+        datos['subject_area_category'] = ', '.join(categorias) or None
+    return datos
+
+
+def url_widget(src):
+    return SCIMAGO_BASE_URL + '/' + src
+
+
+class ExtractorLegado:
+    """Implementación original: una búsqueda con find() por cada campo."""
+
+    nombre = 'legado'
+
+    def url_revista(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        result = soup.select_one('span.jrnlname')
+        if result:
+            return SCIMAGO_BASE_URL + '/' + result.find_parent('a')['href']
+        return None
+
+    def _texto_siguiente_p(self, soup, texto):
+        try:
+            section = soup.find('h2', string=lambda s: s and texto in s)
+            return section.find_next_sibling('p').text.strip() if section else None
+        except Exception as e:
+            print(f"Error al extraer {texto}: {e}")
+            return None
+
+    def _subject_area(self, soup):
+        section = soup.find("h2", string=SUBJECT_AREA)
+        if not section:
+            return None
+        table = section.find_next("table")
+        if not table:
+            return None
+        items = table.find_all("td")
+        return [td.get_text(strip=True) for td in items if td]
+
+    def datos_revista(self, html, url):
+        soup = BeautifulSoup(html, 'html.parser')
+        datos = resultado_vacio(url)
+        for texto, clave in CAMPOS_H2:
+            datos[clave] = self._texto_siguiente_p(soup, texto)
+
+        try:
+            homepage_section = soup.find('a', string='Homepage')
+            datos['site'] = homepage_section['href'] if homepage_section else None
+        except Exception as e:
+            print(f"Error al extraer Homepage: {e}")
+
+        try:
+            img = soup.find('img', class_='imgwidget')
+            if img and 'src' in img.attrs:
+                datos['widget'] = url_widget(img['src'])
+        except Exception as e:
+            print(f"Error al extraer imagen: {e}")
+
+        return tipar_metricas(datos, self._subject_area(soup))
+
+
+class ExtractorBs4:
+    """BeautifulSoup con un solo recorrido por los h2 del documento."""
+
+    nombre = 'bs4'
+
+    def __init__(self):
+        self.parser = 'lxml' if HAY_LXML else 'html.parser'
+
+    def url_revista(self, html):
+        soup = BeautifulSoup(html, self.parser)
+        result = soup.select_one('span.jrnlname')
+        if result:
+            return SCIMAGO_BASE_URL + '/' + result.find_parent('a')['href']
+        return None
+
+    def datos_revista(self, html, url):
+        soup = BeautifulSoup(html, self.parser)
+        datos = resultado_vacio(url)
+        pendientes = dict(CAMPOS_H2)
+        categorias = None
+
+        for h2 in soup.find_all('h2'):
+            titulo = h2.string
+            if not titulo:
+                continue
+            if titulo == SUBJECT_AREA and categorias is None:
+                table = h2.find_next('table')
+                if table:
+                    categorias = [td.get_text(strip=True) for td in table.find_all('td')]
+                continue
+            for texto, clave in list(pendientes.items()):
+                if texto in titulo:
+                    p = h2.find_next_sibling('p')
+                    datos[clave] = p.text.strip() if p else None
+                    del pendientes[texto]
+
+        homepage = soup.find('a', string='Homepage')
+        if homepage is not None:
+            datos['site'] = homepage.get('href')
+        img = soup.find('img', class_='imgwidget')
+        if img is not None and img.get('src'):
+            datos['widget'] = url_widget(img['src'])
+        return tipar_metricas(datos, categorias)
+
+
+class ExtractorLxml:
+    """lxml.html: árbol construido en C y un solo recorrido por los h2."""
+
+    nombre = 'lxml'
+
+    def __init__(self):
+        # El texto se le pasa a lxml como bytes UTF-8 con la codificación fija:
+        # con str rechaza los documentos con declaración de codificación
+        self.parser = lxml.html.HTMLParser(encoding='utf-8')
+
+    def _arbol(self, html):
+        """Árbol del documento, o None si está vacío (como lo trata BeautifulSoup)."""
+        if isinstance(html, str):
+            html = html.encode('utf-8')
+        if not html.strip():
+            return None
+        try:
+            return lxml.html.fromstring(html, parser=self.parser)
+        except lxml.etree.ParserError:
+            # "Document is empty": solo comentarios o espacios
+            return None
+
+    def url_revista(self, html):
+        arbol = self._arbol(html)
+        if arbol is None:
+            return None
+        spans = arbol.xpath("//span[contains(concat(' ', normalize-space(@class), ' '), ' jrnlname ')]")
+        if not spans:
+            return None
+        enlaces = spans[0].xpath('ancestor::a[1]')
+        if not enlaces:
+            return None
+        return SCIMAGO_BASE_URL + '/' + enlaces[0].get('href')
+
+    def datos_revista(self, html, url):
+        arbol = self._arbol(html)
+        if arbol is None:
+            return resultado_vacio(url)
+        datos = resultado_vacio(url)
+        pendientes = dict(CAMPOS_H2)
+        categorias = None
+
+        for h2 in arbol.iter('h2'):
+            titulo = h2.text_content()
+            if not titulo:
+                continue
+            if titulo == SUBJECT_AREA and categorias is None:
+                tablas = h2.xpath('following::table[1]')
+                if tablas:
+                    categorias = [''.join(t.strip() for t in td.itertext()) for td in tablas[0].iter('td')]
+                continue
+            for texto, clave in list(pendientes.items()):
+                if texto in titulo:
+                    p = next(h2.itersiblings('p'), None)
+                    datos[clave] = p.text_content().strip() if p is not None else None
+                    del pendientes[texto]
+
+        homepage = arbol.xpath("//a[text()='Homepage' and count(*)=0]")
+        if homepage:
+            datos['site'] = homepage[0].get('href')
+        img = arbol.xpath("//img[contains(concat(' ', normalize-space(@class), ' '), ' imgwidget ')]")
+        if img and img[0].get('src'):
+            datos['widget'] = url_widget(img[0].get('src'))
+        return tipar_metricas(datos, categorias)
+
+
+EXTRACTORES = {
+    'lxml': ExtractorLxml,
+    'bs4': ExtractorBs4,
+    'legado': ExtractorLegado,
+}
+
+
+def obtener_extractor(nombre=None):
+    """Devuelve el extractor pedido o, sin nombre, el más rápido disponible."""
+    if nombre is None:
+        nombre = 'lxml' if HAY_LXML else 'bs4'
+    if nombre == 'lxml' and not HAY_LXML:
+        raise ValueError("El extractor 'lxml' requiere instalar lxml")
+    if nombre not in EXTRACTORES:
+        raise ValueError(f"Extractor desconocido: {nombre}")
+    return EXTRACTORES[nombre]()
@@ -0,0 +1,171 @@
+"""
+Importa el ranking completo de SCImago desde el CSV que se descarga en
+https://www.scimagojr.com/journalrank.php (botón "Download data").
+
+En lugar de dos peticiones por revista, un solo archivo local da H-Index,
+editorial, ISSN, tipo, áreas y categorías de todas las revistas. Los
+títulos del CSV se emparejan con los de revistas.json (exactos o por
+similitud, con utils/emparejar_titulos.py) y se escriben en
+revistas_scimagojr.json con el mismo esquema que produce sjr_scraper.py.
+
+La URL de la revista y la del widget se derivan del Sourceid. El CSV no
+trae la página de inicio de la revista ('site'); con --completar se
+descarga solo la página de cada revista a la que le falta, con el mismo
+cliente HTTP (límite de tasa, reintentos y caché) que el scraper.
+
+Uso:
+    python scraper/importar_scimago.py scimagojr_2024.csv
+    python scraper/importar_scimago.py scimagojr_2024.csv --completar --tasa 1
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from bitacora import BitacoraProgreso
+from cache_http import CacheHTTP
+from extractor import SCIMAGO_BASE_URL, obtener_extractor, resultado_vacio, tipar_metricas, url_widget
+from red import ClienteHTTP
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'utils'))
+from emparejar_titulos import UMBRAL, EmparejadorTitulos, emparejar_todos  # noqa: E402
+
+INPUT_JSON = os.path.join(BASE_DIR, 'datos', 'json', 'revistas.json')
+OUTPUT_JSON = os.path.join(BASE_DIR, 'datos', 'json', 'revistas_scimagojr.json')
+BACKUP_JSON = os.path.join(BASE_DIR, 'datos', 'json', 'revistas_scimagojr_backup.json')
+BITACORA_JSONL = os.path.join(BASE_DIR, 'datos', 'json', 'revistas_scimagojr.jsonl')
+CACHE_DIR = os.path.join(BASE_DIR, 'datos', 'cache_http')
+
+# Tipo del CSV -> texto que muestra la página de la revista
+TIPOS_PUBLICACION = {
+    'journal': 'Journals',
+    'book series': 'Book Series',
+    'conference and proceedings': 'Conferences and Proceedings',
+    'trade journal': 'Trade Journals',
+}
+
+# "Oncology (Q1)" -> "Oncology"
+_CUARTIL = re.compile(r'\s*\(Q\d\)$')
+
+
+def _lista(valor):
+    """Elementos de un campo separado por ';' del CSV, sin vacíos."""
+    return [v.strip() for v in (valor or '').split(';') if v.strip()]
+
+
+def registro_scimago(fila):
+    """Convierte una fila del CSV de SCImago al esquema de revistas_scimagojr.json."""
+    sourceid = fila['Sourceid'].strip()
+    datos = resultado_vacio(f"{SCIMAGO_BASE_URL}/journalsearch.php?q={sourceid}&tip=sid&clean=0")
+    categorias = [_CUARTIL.sub('', c) for c in _lista(fila.get('Categories'))]
+    tipo = (fila.get('Type') or '').strip()
+
+    datos['h_index'] = fila.get('H index')
+    datos['publisher'] = (fila.get('Publisher') or '').strip() or None
+    datos['issn'] = (fila.get('Issn') or '').strip() or None
+    datos['widget'] = url_widget(f'journal_img.php?id={sourceid}')
+    datos['publication_type'] = TIPOS_PUBLICACION.get(tipo.lower(), tipo) or None
+    return tipar_metricas(datos, _lista(fila.get('Areas')) + categorias)
+
+
+def leer_ranking(ruta):
+    """{título en SCImago: registro} a partir del CSV del ranking."""
+    registros = {}
+    with open(ruta, 'r', encoding='utf-8-sig', newline='') as f:
+        for fila in csv.DictReader(f, delimiter=';'):
+            titulo = (fila.get('Title') or '').strip()
+            if titulo and (fila.get('Sourceid') or '').strip():
+                registros.setdefault(titulo, registro_scimago(fila))
+    return registros
+
+
+def completar_sitios(datos, titulos, concurrencia, tasa, cache, sin_red):
+    """Descarga la página de cada revista para obtener 'site' (y el widget si falta)."""
+    cliente = ClienteHTTP(concurrencia=concurrencia, tasa=tasa, cache=cache, sin_red=sin_red)
+    extractor = obtener_extractor()
+
+    def pagina(titulo):
+        url = datos[titulo]['url']
+        return extractor.datos_revista(cliente.get(url).text, url)
+
+    completados = 0
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        futuros = {pool.submit(pagina, titulo): titulo for titulo in titulos}
+        for futuro in as_completed(futuros):
+            titulo = futuros[futuro]
+            try:
+                extraidos = futuro.result()
+            except Exception as error:
+                print(f"Error al completar {titulo}: {error}")
+                continue
+            for campo in ('site', 'widget'):
+                if not datos[titulo].get(campo) and extraidos.get(campo):
+                    datos[titulo][campo] = extraidos[campo]
+            completados += 1
+    return completados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa el CSV del ranking de SCImago a revistas_scimagojr.json')
+    parser.add_argument('csv', help='CSV descargado de scimagojr.com/journalrank.php')
+    parser.add_argument('--umbral', type=float, default=UMBRAL,
+                        help=f'Similitud mínima para emparejar títulos (default: {UMBRAL})')
+    parser.add_argument('--procesos', type=int, help='Procesos para emparejar títulos (default: número de CPUs)')
+    parser.add_argument('--no-sobrescribir', action='store_true',
+                        help='Conservar las revistas que ya tienen datos en revistas_scimagojr.json')
+    parser.add_argument('--completar', action='store_true',
+                        help="Descargar la página de las revistas sin 'site' (el CSV no lo incluye)")
+    parser.add_argument('--concurrencia', type=int, default=4, help='Páginas descargadas en paralelo con --completar')
+    parser.add_argument('--tasa', type=float, default=1.0, help='Peticiones por segundo con --completar (default: 1.0)')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Directorio del caché de páginas descargadas')
+    parser.add_argument('--sin-red', action='store_true', help='Con --completar, usar solo páginas en caché')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    ranking = leer_ranking(args.csv)
+    with open(INPUT_JSON, 'r', encoding='utf-8') as f:
+        titulos = list(json.load(f))
+    print(f"Ranking: {len(ranking)} revistas; revistas.json: {len(titulos)} títulos")
+
+    bitacora = BitacoraProgreso(OUTPUT_JSON, BITACORA_JSONL, BACKUP_JSON)
+    datos = bitacora.cargar()
+    if args.no_sobrescribir:
+        titulos = [t for t in titulos if t not in datos]
+
+    pares = emparejar_todos(EmparejadorTitulos(ranking, umbral=args.umbral), titulos, args.procesos)
+    # Un registro que ya coincide exactamente con otro título es de otra revista
+    con_exacto = {titulo_scimago for titulo_scimago, similitud in pares.values() if similitud == 1.0}
+    pares = {t: (titulo_scimago, similitud) for t, (titulo_scimago, similitud) in pares.items()
+             if similitud == 1.0 or titulo_scimago not in con_exacto}
+    exactos = sum(1 for _, similitud in pares.values() if similitud == 1.0)
+    print(f"Emparejados: {len(pares)} ({exactos} exactos, {len(pares) - exactos} por similitud)")
+
+    for titulo, (titulo_scimago, similitud) in pares.items():
+        registro = dict(ranking[titulo_scimago], title=titulo_scimago, similarity=round(similitud, 4))
+        anterior = datos.get(titulo) or {}
+        # Lo que el CSV no trae se conserva de la extracción anterior de la misma revista
+        if anterior.get('url') == registro['url']:
+            for campo, valor in anterior.items():
+                if registro.get(campo) is None:
+                    registro[campo] = valor
+        datos[titulo] = registro
+
+    if args.completar:
+        sin_sitio = [t for t in pares if not datos[t].get('site')]
+        print(f"Completando 'site' de {len(sin_sitio)} revistas desde sus páginas...")
+        cache = CacheHTTP(args.cache_dir)
+        completados = completar_sitios(datos, sin_sitio, args.concurrencia, args.tasa, cache, args.sin_red)
+        print(f"Páginas procesadas: {completados}")
+
+    bitacora.compactar()
+    print(f"Guardado {OUTPUT_JSON}: {len(datos)} revistas ({time.perf_counter() - inicio:.1f} s)")
+
+
+if __name__ == '__main__':
+    main()
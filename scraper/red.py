@@ -0,0 +1,125 @@
+"""
+Utilidades de red para el scraper: sesión HTTP compartida, límite de
+peticiones por host (token bucket), reintentos con espera exponencial y
+caché en disco opcional.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, Gecko) Chrome/123.0.0.0 Safari/537.36'
+}
+
+# Códigos HTTP que vale la pena reintentar
+CODIGOS_REINTENTO = {429, 500, 502, 503, 504}
+
+
+class LimitadorTasa:
+    """Token bucket por host: `tasa` peticiones por segundo con ráfagas de hasta `rafaga`."""
+
+    def __init__(self, tasa=1.0, rafaga=2):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self._cubetas = {}
+        self._lock = threading.Lock()
+
+    def esperar(self, host):
+        """Bloquea hasta que haya una ficha disponible para el host."""
+        if self.tasa <= 0:
+            return
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                fichas, ultima = self._cubetas.get(host, (self.rafaga, ahora))
+                fichas = min(self.rafaga, fichas + (ahora - ultima) * self.tasa)
+                if fichas >= 1:
+                    self._cubetas[host] = (fichas - 1, ahora)
+                    return
+                self._cubetas[host] = (fichas, ahora)
+                espera = (1 - fichas) / self.tasa
+            time.sleep(espera)
+
+
+class ErrorHTTP(Exception):
+    """Respuesta con código distinto de 200 después de agotar los reintentos."""
+
+    def __init__(self, status_code, url):
+        super().__init__(f"Error {status_code} en {url}")
+        self.status_code = status_code
+        self.url = url
+
+
+class SinConexion(Exception):
+    """La URL no está en caché y el cliente trabaja sin red."""
+
+
+class ClienteHTTP:
+    """Sesión compartida entre hilos con límite de tasa, reintentos y caché opcional."""
+
+    def __init__(self, concurrencia=4, tasa=1.0, rafaga=2, reintentos=4, espera_base=2.0, timeout=15,
+                 cache=None, sin_red=False):
+        self.sesion = requests.Session()
+        self.sesion.headers.update(HEADERS)
+        adaptador = HTTPAdapter(pool_connections=concurrencia, pool_maxsize=concurrencia)
+        self.sesion.mount('https://', adaptador)
+        self.sesion.mount('http://', adaptador)
+        self.limitador = LimitadorTasa(tasa, rafaga)
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.timeout = timeout
+        self.cache = cache
+        self.sin_red = sin_red
+
+    def _espera(self, intento, response=None):
+        """Segundos a esperar antes del siguiente intento (Retry-After o exponencial)."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        return self.espera_base * (2 ** intento) + random.uniform(0, self.espera_base)
+
+    def _descargar(self, url, headers=None):
+        """Petición con límite de tasa y reintentos; acepta 200 y 304."""
+        host = urlparse(url).netloc
+        for intento in range(self.reintentos + 1):
+            self.limitador.esperar(host)
+            try:
+                response = self.sesion.get(url, timeout=self.timeout, headers=headers)
+            except (requests.ConnectionError, requests.Timeout):
+                if intento == self.reintentos:
+                    raise
+                time.sleep(self._espera(intento))
+                continue
+            if response.status_code in CODIGOS_REINTENTO and intento < self.reintentos:
+                time.sleep(self._espera(intento, response))
+                continue
+            if response.status_code not in (200, 304):
+                raise ErrorHTTP(response.status_code, url)
+            return response
+
+    def get(self, url):
+        if self.cache is None:
+            return self._descargar(url)
+
+        entrada = self.cache.entrada(url)
+        guardada = self.cache.respuesta(url, entrada) if entrada else None
+        if guardada is not None and (self.sin_red or self.cache.vigente(entrada)):
+            return guardada
+        if self.sin_red:
+            raise SinConexion(f"Sin red y sin copia en caché: {url}")
+
+        cabeceras = self.cache.cabeceras_revalidacion(entrada) if guardada is not None else None
+        response = self._descargar(url, cabeceras)
+        if response.status_code == 304:
+            if guardada is None:
+                raise ErrorHTTP(304, url)
+            self.cache.renovar(url, entrada)
+            return guardada
+        self.cache.guardar(url, response)
+        return response
@@ -1,10 +1,17 @@
 import os
 import json
 import time
-import requests
 import argparse
+import subprocess
+import sys
 import threading
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from bitacora import BitacoraProgreso
+from cache_http import CacheHTTP
+from cola_trabajo import ColaTrabajo, Latidos, id_trabajador
+from extractor import EXTRACTORES, obtener_extractor
+from red import ClienteHTTP
 
 # Obtener la ruta base del proyecto
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -13,17 +20,12 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 INPUT_JSON = os.path.join(BASE_DIR, 'datos', 'json', 'revistas.json')
 OUTPUT_JSON = os.path.join(BASE_DIR, 'datos', 'json', 'revistas_scimagojr.json')
 BACKUP_JSON = os.path.join(BASE_DIR, 'datos', 'json', 'revistas_scimagojr_backup.json')
+BITACORA_JSONL = os.path.join(BASE_DIR, 'datos', 'json', 'revistas_scimagojr.jsonl')
+CACHE_DIR = os.path.join(BASE_DIR, 'datos', 'cache_http')
+COLA_DB = os.path.join(BASE_DIR, 'datos', 'json', 'cola_scimagojr.sqlite3')
 
-# Configurar argumentos de línea de comandos
-parser = argparse.ArgumentParser(description='Scraper de ScimagoJR con punto de inicio configurable')
-parser.add_argument('--inicio', type=int, default=0, help='Índice desde donde empezar a procesar (default: 0)')
-parser.add_argument('--fin', type=int, help='Índice donde terminar de procesar (opcional)')
-parser.add_argument('--reverso', action='store_true', help='Procesar las revistas en orden inverso')
-args = parser.parse_args()
-
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, Gecko) Chrome/123.0.0.0 Safari/537.36'
-}
+# Segundos entre revisiones del coordinador
+INTERVALO_COORDINADOR = 2
 
 SCIMAGO_BASE_URL = 'https://www.scimagojr.com'
 SEARCH_URL = SCIMAGO_BASE_URL + '/journalsearch.php?q='
@@ -35,149 +37,62 @@ LOG_INFO = "ℹ️"
 LOG_WARNING = "⚠️"
 LOG_PROCESSING = "🔄"
 
-def save_data_safely(data, titulo=""):
-    """Guarda los datos en el archivo principal y en el backup de forma segura"""
+# Progreso del scraper: JSON compactado más la bitácora de solo agregado
+bitacora = BitacoraProgreso(OUTPUT_JSON, BITACORA_JSONL, BACKUP_JSON)
+
+def save_data_safely(titulo, datos):
+    """Agrega una revista a la bitácora (una línea, sincronizada a disco)"""
     try:
-        # Primero intentamos guardar en el backup
-        with open(BACKUP_JSON, 'w', encoding='utf-8') as archivo_backup:
-            json.dump(data, archivo_backup, indent=4, ensure_ascii=False)
-        
-        # Si el backup fue exitoso, guardamos en el archivo principal
-        with open(OUTPUT_JSON, 'w', encoding='utf-8') as archivo_salida:
-            json.dump(data, archivo_salida, indent=4, ensure_ascii=False)
-        
-        if titulo:
-            print(f"{LOG_SUCCESS} Información guardada exitosamente: {titulo}")
+        bitacora.registrar(titulo, datos)
+        print(f"{LOG_SUCCESS} Información guardada exitosamente: {titulo}")
         return True
     except Exception as save_error:
         print(f"{LOG_ERROR} Error al guardar los datos: {str(save_error)}")
         return False
 
-# Cargar revistas ya obtenidas
-if os.path.exists(OUTPUT_JSON):
-    with open(OUTPUT_JSON, 'r', encoding='utf-8') as f:
-        revistas_data = json.load(f)
-elif os.path.exists(BACKUP_JSON):
-    print(f"{LOG_INFO} Recuperando datos del archivo de respaldo...")
-    with open(BACKUP_JSON, 'r', encoding='utf-8') as f:
-        revistas_data = json.load(f)
-else:
-    revistas_data = {}
+def compactar_datos():
+    """Vuelca la bitácora al JSON que lee la aplicación web"""
+    try:
+        bitacora.compactar()
+        print(f"{LOG_SUCCESS} Datos compactados en {OUTPUT_JSON}: {len(bitacora)} revistas")
+        return True
+    except Exception as save_error:
+        print(f"{LOG_ERROR} Error al compactar los datos: {str(save_error)}")
+        return False
+
+# Cliente HTTP compartido por todos los hilos; main() lo reconfigura con los argumentos
+cliente = ClienteHTTP()
 
 def scrap(url):
-    response = requests.get(url, headers=HEADERS, timeout=15)
-    if response.status_code != 200:
-        raise Exception(f"Error {response.status_code} en {url}")
-    return response
+    # El cliente reintenta 429/5xx y lanza ErrorHTTP si la respuesta no es 200
+    return cliente.get(url)
+
+# Extractor de HTML; main() lo reemplaza si se pide otro con --extractor
+extractor = obtener_extractor()
 
 def find_journal_url(journal_title):
     search = SEARCH_URL + journal_title.replace(" ", "+")
-    soup = BeautifulSoup(scrap(search).text, 'html.parser')
-    result = soup.select_one('span.jrnlname')
-    if result:
-        return SCIMAGO_BASE_URL + '/' + result.find_parent('a')['href']
-    return None
-
-def obtenerimagen(soup):
-    try:
-        img = soup.find('img', class_='imgwidget')
-        if img and 'src' in img.attrs:
-            return 'https://www.scimagojr.com/' + img['src']
-    except Exception as e:
-        print(f"Error al extraer imagen: {e}")
-    return None
-
-def extract_subject_area(soup):
-    section = soup.find("h2", string="Subject Area and Category")
-    if not section:
-        return None
-    table = section.find_next("table")
-    if not table:
-        return None
-    items = table.find_all("td")
-    categories = [td.get_text(strip=True) for td in items if td]
-    return ', '.join(categories)
+    return extractor.url_revista(scrap(search).text)
 
 def scrape_journal_data(url):
-    soup = BeautifulSoup(scrap(url).text, 'html.parser')
+    return extractor.datos_revista(scrap(url).text, url)
 
-    # Obtener H-Index
-    try:
-        h_index_section = soup.find('h2', string=lambda s: s and 'H-Index' in s)
-        h_index = h_index_section.find_next_sibling('p').text.strip() if h_index_section else None
-    except Exception as e:
-        print(f"Error al extraer H-Index: {e}")
-        h_index = None
-
-    # Obtener Homepage
-    try:
-        homepage_section = soup.find('a', string='Homepage')
-        homepage_link = homepage_section['href'] if homepage_section else None
-    except Exception as e:
-        print(f"Error al extraer Homepage: {e}")
-        homepage_link = None
-
-    # Obtener Publisher
-    try:
-        publisher_section = soup.find('h2', string=lambda s: s and 'Publisher' in s)
-        publisher = publisher_section.find_next_sibling('p').text.strip() if publisher_section else None
-    except Exception as e:
-        print(f"Error al extraer Publisher: {e}")
-        publisher = None
-
-    # Obtener ISSN
-    try:
-        issn_section = soup.find('h2', string=lambda s: s and 'ISSN' in s)
-        issn = issn_section.find_next_sibling('p').text.strip() if issn_section else None
-    except Exception as e:
-        print(f"Error al extraer ISSN: {e}")
-        issn = None
+def seleccionar_revistas(revistas_input, inicio, fin_arg, reverso):
+    """Aplica --inicio/--fin/--reverso y devuelve (revistas, inicio, fin)."""
+    fin = fin_arg if fin_arg is not None else len(revistas_input)
+    revistas_items = list(revistas_input.items())
 
-    # Obtener imagen del widget
-    widget_url = obtenerimagen(soup)
+    # Si es en reverso, invertimos el orden
+    if reverso:
+        revistas_items = revistas_items[::-1]
+        # Ajustamos inicio y fin para mantener la lógica con el orden invertido
+        if fin_arg is not None:
+            temp_inicio = len(revistas_items) - fin
+            temp_fin = len(revistas_items) - inicio
+            inicio = temp_inicio
+            fin = temp_fin
 
-    # Obtener Publication Type
-    try:
-        publication_type_section = soup.find('h2', string=lambda s: s and 'Publication type' in s)
-        publication_type = publication_type_section.find_next_sibling('p').text.strip() if publication_type_section else None
-    except Exception as e:
-        print(f"Error al extraer Publication type: {e}")
-        publication_type = None
-
-    return {
-        "site": homepage_link,
-        "h_index": h_index,
-        "subject_area_category": extract_subject_area(soup),
-        "publisher": publisher,
-        "issn": issn,
-        "widget": widget_url,
-        "publication_type": publication_type,
-        "url": url
-    }
-
-# Cargar títulos a procesar
-with open(INPUT_JSON, 'r', encoding='utf-8') as f:
-    revistas_input = json.load(f)
-
-# Calcular el rango de revistas a procesar
-inicio = args.inicio
-fin = args.fin if args.fin is not None else len(revistas_input)
-revistas_items = list(revistas_input.items())
-
-# Si es en reverso, invertimos el orden
-if args.reverso:
-    revistas_items = revistas_items[::-1]
-    # Ajustamos inicio y fin para mantener la lógica con el orden invertido
-    if args.fin is not None:
-        temp_inicio = len(revistas_items) - fin
-        temp_fin = len(revistas_items) - inicio
-        inicio = temp_inicio
-        fin = temp_fin
-
-revistas_a_procesar = revistas_items[inicio:fin]
-
-print(f"{LOG_INFO} Procesando {'en reverso ' if args.reverso else ''}desde el índice {inicio} hasta {fin}")
-print(f"{LOG_INFO} Total de revistas a procesar: {len(revistas_a_procesar)}")
+    return revistas_items[inicio:fin], inicio, fin
 
 # Variable global para pausar el proceso
 is_paused = False
@@ -190,12 +105,8 @@ def toggle_pause():
     print(f"{LOG_INFO} Proceso {estado}.")
 
 def contar_archivos_json():
-    """Cuenta los elementos JSON en el archivo revistas_scimagojr.json."""
-    if os.path.exists(OUTPUT_JSON):
-        with open(OUTPUT_JSON, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return len(data)
-    return 0
+    """Cuenta las revistas guardadas (JSON compactado más bitácora)."""
+    return len(bitacora)
 
 # Hilo para escuchar comandos de pausa
 def escuchar_comandos():
@@ -204,38 +115,219 @@ def escuchar_comandos():
         if comando == 'pausar':
             toggle_pause()
 
-# Iniciar el hilo de comandos
-threading.Thread(target=escuchar_comandos, daemon=True).start()
-
-procesados_count = 0
-for titulo_revista, _ in revistas_a_procesar:
+def procesar_revista(titulo_revista, indice):
+    """Busca y extrae una revista. Se ejecuta en los hilos del pool."""
     while is_paused:
         print(f"{LOG_INFO} Proceso en pausa. Archivos JSON generados: {contar_archivos_json()}")
         time.sleep(5)  # Esperar mientras está pausado
 
-    if titulo_revista in revistas_data:
-        print(f"{LOG_INFO} Revista ya procesada anteriormente: {titulo_revista}")
-        continue
-
-    print(f"{LOG_PROCESSING} Buscando información de la revista: {titulo_revista} (índice: {inicio + procesados_count})")
+    print(f"{LOG_PROCESSING} Buscando información de la revista: {titulo_revista} (índice: {indice})")
+    url_revista = find_journal_url(titulo_revista)
+    if not url_revista:
+        print(f"{LOG_ERROR} No se encontró la revista en Scimago: {titulo_revista}")
+        return None
+    return scrape_journal_data(url_revista)
+
+def configurar(args, tasa):
+    """Reconfigura el cliente HTTP y el extractor globales con los argumentos."""
+    global cliente, extractor
+    cache = None if args.sin_cache else CacheHTTP(args.cache_dir, ttl=args.cache_ttl * 3600)
+    cliente = ClienteHTTP(concurrencia=args.concurrencia, tasa=tasa,
+                          rafaga=args.rafaga, reintentos=args.reintentos,
+                          cache=cache, sin_red=args.sin_red)
+    extractor = obtener_extractor(args.extractor)
+
+def comando_trabajador(args, tasa):
+    """Línea de comandos para lanzar un proceso trabajador con la misma configuración."""
+    comando = [sys.executable, os.path.abspath(__file__), '--trabajador',
+               '--cola', args.cola, '--lease', str(args.lease), '--max-intentos', str(args.max_intentos),
+               '--concurrencia', str(args.concurrencia), '--tasa', str(tasa),
+               '--rafaga', str(args.rafaga), '--reintentos', str(args.reintentos),
+               '--cache-dir', args.cache_dir, '--cache-ttl', str(args.cache_ttl)]
+    if args.extractor:
+        comando += ['--extractor', args.extractor]
+    if args.sin_cache:
+        comando.append('--sin-cache')
+    if args.sin_red:
+        comando.append('--sin-red')
+    return comando
+
+def trabajar(args):
+    """Modo trabajador: toma títulos de la cola hasta que no quede ninguno."""
+    cola = ColaTrabajo(args.cola, duracion_lease=args.lease, max_intentos=args.max_intentos)
+    trabajador = id_trabajador()
+    print(f"{LOG_INFO} Trabajador {trabajador} usando la cola {args.cola}")
+
+    procesados_count = 0
+    with Latidos(cola, trabajador), ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+        while True:
+            lote = cola.arrendar(trabajador, args.concurrencia)
+            if not lote:
+                if cola.terminada():
+                    break
+                # Otros trabajadores tienen títulos asignados; si alguno se
+                # detiene, sus arrendamientos vencen y se vuelven a repartir
+                time.sleep(min(args.lease, 10))
+                continue
+
+            futuros = {pool.submit(procesar_revista, titulo, indice): titulo for titulo, indice in lote}
+            for futuro in as_completed(futuros):
+                titulo_revista = futuros[futuro]
+                try:
+                    datos_revista = futuro.result()
+                except Exception as error:
+                    print(f"{LOG_ERROR} Error al procesar la revista {titulo_revista}: {str(error)}")
+                    cola.fallar(titulo_revista, error)
+                    continue
+                # Sin resultado también se completa, para no volver a buscarla
+                cola.completar(titulo_revista, datos_revista)
+                if datos_revista is not None:
+                    procesados_count += 1
+    cola.cerrar()
+    print(f"{LOG_SUCCESS} Trabajador {trabajador} terminado. Revistas extraídas: {procesados_count}")
+
+def volcar_resultados(cola):
+    """Pasa a la bitácora los resultados que los trabajadores dejaron en la cola."""
+    nuevos = cola.resultados_nuevos()
+    guardados = [titulo for titulo, datos in nuevos if save_data_safely(titulo, datos)]
+    cola.marcar_volcados(guardados)
+    return len(guardados)
+
+def coordinar(args, revistas_a_procesar, inicio, revistas_data):
+    """Modo coordinador: siembra la cola, lanza los trabajadores y recoge resultados."""
+    cola = ColaTrabajo(args.cola, duracion_lease=args.lease, max_intentos=args.max_intentos)
+    nuevos = cola.sembrar(
+        (titulo_revista, inicio + posicion)
+        for posicion, (titulo_revista, _) in enumerate(revistas_a_procesar)
+        if titulo_revista not in revistas_data)
+    print(f"{LOG_INFO} Cola {args.cola}: {nuevos} títulos nuevos, estado {cola.resumen()}")
+
+    # Cada proceso tiene su propio limitador; la tasa total se reparte entre ellos
+    tasa = args.tasa / args.coordinar if args.coordinar else args.tasa
+    procesos = [subprocess.Popen(comando_trabajador(args, tasa)) for _ in range(args.coordinar)]
+    print(f"{LOG_INFO} Trabajadores lanzados: {len(procesos)} ({tasa:.2f} peticiones/s cada uno)")
+
+    procesados_count = 0
+    try:
+        while True:
+            volcados = volcar_resultados(cola)
+            procesados_count += volcados
+            if volcados:
+                print(f"{LOG_INFO} Estado de la cola: {cola.resumen()}")
+            if cola.terminada():
+                break
+            if procesos and all(p.poll() is not None for p in procesos):
+                print(f"{LOG_WARNING} Todos los trabajadores terminaron y quedan títulos en la cola: {cola.resumen()}")
+                break
+            time.sleep(INTERVALO_COORDINADOR)
+    except KeyboardInterrupt:
+        print(f"{LOG_WARNING} Interrumpido por el usuario, deteniendo trabajadores...")
+    finally:
+        for proceso in procesos:
+            if proceso.poll() is None:
+                proceso.terminate()
+        for proceso in procesos:
+            proceso.wait()
+        procesados_count += volcar_resultados(cola)
+        resumen = cola.resumen()
+        cola.cerrar()
+
+    if resumen['fallido']:
+        print(f"{LOG_WARNING} {resumen['fallido']} revistas agotaron sus intentos; ver la columna error en {args.cola}")
+    return procesados_count
+
+def main():
+    # Configurar argumentos de línea de comandos
+    parser = argparse.ArgumentParser(description='Scraper de ScimagoJR con punto de inicio configurable')
+    parser.add_argument('--inicio', type=int, default=0, help='Índice desde donde empezar a procesar (default: 0)')
+    parser.add_argument('--fin', type=int, help='Índice donde terminar de procesar (opcional)')
+    parser.add_argument('--reverso', action='store_true', help='Procesar las revistas en orden inverso')
+    parser.add_argument('--concurrencia', type=int, default=4, help='Revistas procesadas en paralelo (default: 4)')
+    parser.add_argument('--tasa', type=float, default=1.0, help='Peticiones por segundo a ScimagoJR (default: 1.0)')
+    parser.add_argument('--rafaga', type=int, default=2, help='Peticiones seguidas permitidas antes de limitar (default: 2)')
+    parser.add_argument('--reintentos', type=int, default=4, help='Reintentos ante 429/5xx o errores de conexión (default: 4)')
+    parser.add_argument('--compactar', action='store_true', help='Solo volcar la bitácora al JSON principal y salir')
+    parser.add_argument('--extractor', choices=list(EXTRACTORES), help='Extractor de HTML (default: lxml si está instalado)')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Directorio del caché de páginas descargadas')
+    parser.add_argument('--cache-ttl', type=float, default=168, help='Horas que una página en caché se usa sin revalidar (default: 168)')
+    parser.add_argument('--sin-cache', action='store_true', help='No leer ni guardar páginas en caché')
+    parser.add_argument('--sin-red', action='store_true', help='Usar solo páginas en caché, sin conectarse a ScimagoJR')
+    parser.add_argument('--coordinar', type=int, metavar='N',
+                        help='Repartir las revistas entre N procesos trabajadores mediante la cola (0: solo coordinar)')
+    parser.add_argument('--trabajador', action='store_true', help='Tomar revistas de la cola hasta vaciarla')
+    parser.add_argument('--cola', default=COLA_DB, help='Base SQLite de la cola de trabajo')
+    parser.add_argument('--lease', type=float, default=120, help='Segundos que dura el arrendamiento de un título (default: 120)')
+    parser.add_argument('--max-intentos', type=int, default=3, help='Intentos por título antes de darlo por fallido (default: 3)')
+    args = parser.parse_args()
+
+    # Los trabajadores no tocan la bitácora: dejan sus resultados en la cola
+    if args.trabajador:
+        configurar(args, args.tasa)
+        trabajar(args)
+        return
+
+    revistas_data = bitacora.cargar()
+    if bitacora.pendientes:
+        print(f"{LOG_INFO} Recuperadas {bitacora.pendientes} revistas de la bitácora {BITACORA_JSONL}")
+    if args.compactar:
+        compactar_datos()
+        return
+
+    configurar(args, args.tasa)
+
+    # Cargar títulos a procesar
+    with open(INPUT_JSON, 'r', encoding='utf-8') as f:
+        revistas_input = json.load(f)
+
+    revistas_a_procesar, inicio, fin = seleccionar_revistas(revistas_input, args.inicio, args.fin, args.reverso)
+
+    print(f"{LOG_INFO} Procesando {'en reverso ' if args.reverso else ''}desde el índice {inicio} hasta {fin}")
+    print(f"{LOG_INFO} Total de revistas a procesar: {len(revistas_a_procesar)}")
+    print(f"{LOG_INFO} Concurrencia: {args.concurrencia}, tasa: {args.tasa} peticiones/s, extractor: {extractor.nombre}")
+
+    if args.coordinar is not None:
+        procesados_count = coordinar(args, revistas_a_procesar, inicio, revistas_data)
+        compactar_datos()
+        print(f"{LOG_SUCCESS} Proceso finalizado. Nuevas revistas procesadas: {procesados_count}")
+        return
+
+    # Iniciar el hilo de comandos
+    threading.Thread(target=escuchar_comandos, daemon=True).start()
+
+    procesados_count = 0
+    pool = ThreadPoolExecutor(max_workers=args.concurrencia)
     try:
-        url_revista = find_journal_url(titulo_revista)
-        if not url_revista:
-            print(f"{LOG_ERROR} No se encontró la revista en Scimago: {titulo_revista}")
-            continue
-
-        datos_revista = scrape_journal_data(url_revista)
-        revistas_data[titulo_revista] = datos_revista
-        
-        # Guardar progreso después de cada revista procesada exitosamente
-        save_data_safely(revistas_data, titulo_revista)
-        
-        procesados_count += 1
-        time.sleep(2)
-    except Exception as error:
-        print(f"{LOG_ERROR} Error al procesar la revista {titulo_revista}: {str(error)}")
-
-# Asegurar que los datos finales estén guardados
-save_data_safely(revistas_data)
-print(f"{LOG_SUCCESS} Proceso finalizado. Nuevas revistas procesadas: {procesados_count}")
-print(f"{LOG_INFO} Rango procesado: {inicio} - {fin}")
\ No newline at end of file
+        futuros = {}
+        for posicion, (titulo_revista, _) in enumerate(revistas_a_procesar):
+            if titulo_revista in revistas_data:
+                print(f"{LOG_INFO} Revista ya procesada anteriormente: {titulo_revista}")
+                continue
+            futuro = pool.submit(procesar_revista, titulo_revista, inicio + posicion)
+            futuros[futuro] = titulo_revista
+
+        # Los resultados se guardan desde el hilo principal, sin compartir estado entre hilos
+        for futuro in as_completed(futuros):
+            titulo_revista = futuros[futuro]
+            try:
+                datos_revista = futuro.result()
+            except Exception as error:
+                print(f"{LOG_ERROR} Error al procesar la revista {titulo_revista}: {str(error)}")
+                continue
+            if datos_revista is None:
+                continue
+
+            # Guardar progreso después de cada revista procesada exitosamente
+            save_data_safely(titulo_revista, datos_revista)
+            procesados_count += 1
+    except KeyboardInterrupt:
+        print(f"{LOG_WARNING} Interrumpido por el usuario, cancelando revistas pendientes...")
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    # Volcar la bitácora al JSON que lee la aplicación web
+    compactar_datos()
+    print(f"{LOG_SUCCESS} Proceso finalizado. Nuevas revistas procesadas: {procesados_count}")
+    print(f"{LOG_INFO} Rango procesado: {inicio} - {fin}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""Servicios de datos compartidos por la aplicación web."""
+
+from servicios.almacen import AlmacenRevistas, Instantanea
+from servicios.busqueda import MotorBusqueda
+from servicios.facetas import MotorFacetas
+from servicios.indices import IndicesRevistas
+from servicios.listados import ListadosRevistas
+from servicios.sugerencias import IndiceSugerencias
+
+__all__ = ['AlmacenRevistas', 'Instantanea', 'IndiceSugerencias', 'IndicesRevistas',
+           'ListadosRevistas', 'MotorBusqueda', 'MotorFacetas']
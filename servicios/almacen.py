@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Almacén en memoria del catálogo de revistas.
+
+Los archivos JSON se leen una sola vez por proceso y se comparten en modo
+solo lectura entre todos los hilos. Cuando alguno de los archivos cambia en
+disco (mtime, tamaño o inodo) se construye una instantánea nueva y se
+reemplaza la anterior con una sola asignación, de modo que las peticiones en
+curso terminan con la instantánea que ya tenían.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import cached_property
+
+from servicios.busqueda import MotorBusqueda
+from servicios.facetas import MotorFacetas
+from servicios.sugerencias import IndiceSugerencias
+from servicios.indices import IndicesRevistas
+from servicios.listados import ListadosRevistas
+
+
+class Instantanea:
+    """Copia inmutable de los datos cargados en un momento dado."""
+
+    def __init__(self, revistas, scimagojr, version):
+        self.revistas = revistas
+        self.scimagojr = scimagojr
+        self.version = version
+        self.indices = IndicesRevistas(revistas)
+        self.busqueda = MotorBusqueda(revistas)
+        self.listados = ListadosRevistas(revistas, scimagojr, self.indices, self.busqueda)
+
+    @cached_property
+    def facetas(self):
+        # Se construye con la primera consulta facetada
+        return MotorFacetas(self.indices, self.listados, self.busqueda)
+
+    @cached_property
+    def sugerencias(self):
+        # Se construye con la primera petición de autocompletado
+        return IndiceSugerencias(self.listados.ordenados('todas', None, 'h_index', True))
+
+
+def huella_archivo(ruta):
+    """Devuelve (inodo, tamaño, mtime) del archivo o None si no existe."""
+    try:
+        st = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def leer_json(ruta):
+    """Carga un archivo JSON; si no existe devuelve un diccionario vacío."""
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class AlmacenRevistas:
+    """Mantiene la instantánea vigente y la recarga cuando cambian los archivos."""
+
+    def __init__(self, ruta_revistas, ruta_scimagojr, intervalo_revision=2.0):
+        self.ruta_revistas = ruta_revistas
+        self.ruta_scimagojr = ruta_scimagojr
+        self.intervalo_revision = intervalo_revision
+        self._instantanea = None
+        self._huellas = None
+        self._ultima_revision = 0.0
+        self._lock_recarga = threading.Lock()
+
+    def _huellas_actuales(self):
+        return (huella_archivo(self.ruta_revistas), huella_archivo(self.ruta_scimagojr))
+
+    def _cargar(self, huellas):
+        """Lee ambos archivos y publica una nueva instantánea."""
+        revistas = leer_json(self.ruta_revistas)
+        scimagojr = leer_json(self.ruta_scimagojr)
+        version = hashlib.sha1(repr(huellas).encode('utf-8')).hexdigest()[:16]
+        instantanea = Instantanea(revistas, scimagojr, version)
+        # La asignación de atributos es atómica: los lectores ven la
+        # instantánea anterior o la nueva, nunca un estado intermedio.
+        self._huellas = huellas
+        self._instantanea = instantanea
+        return instantanea
+
+    def recargar(self):
+        """Fuerza la lectura de los archivos, aunque no hayan cambiado."""
+        with self._lock_recarga:
+            return self._cargar(self._huellas_actuales())
+
+    def instantanea(self):
+        """Devuelve la instantánea vigente, recargándola si los archivos cambiaron."""
+        actual = self._instantanea
+        if actual is None:
+            # Primera carga: todos los hilos esperan a que exista una instantánea.
+            with self._lock_recarga:
+                if self._instantanea is None:
+                    self._ultima_revision = time.monotonic()
+                    return self._cargar(self._huellas_actuales())
+                return self._instantanea
+
+        ahora = time.monotonic()
+        if ahora - self._ultima_revision < self.intervalo_revision:
+            return actual
+        self._ultima_revision = ahora
+
+        huellas = self._huellas_actuales()
+        if huellas == self._huellas:
+            return actual
+
+        # Solo un hilo reconstruye; el resto sigue atendiendo con la instantánea
+        # anterior en lugar de bloquearse.
+        if not self._lock_recarga.acquire(blocking=False):
+            return actual
+        try:
+            if huellas != self._huellas:
+                return self._cargar(huellas)
+            return self._instantanea
+        except ValueError as e:
+            # Archivo a medio escribir: se conserva la instantánea anterior y
+            # se vuelve a intentar en la siguiente revisión.
+            print(f"No se pudo recargar el catálogo: {e}")
+            return actual
+        finally:
+            self._lock_recarga.release()
@@ -0,0 +1,632 @@
+# -*- coding: utf-8 -*-
+"""
+Almacén del catálogo de revistas sobre SQLite.
+
+revistas.json y revistas_scimagojr.json se materializan en una base de datos
+con tablas normalizadas (revistas, áreas, catálogos, pertenencias y datos de
+SCImago), el ranking por H-Index de cada área y catálogo, índices y dos
+tablas FTS5 sobre los títulos normalizados: una por palabras (con índice de
+prefijos) y otra por trigramas para las búsquedas por subcadena.
+
+La aplicación abre la base en solo lectura con una conexión por hilo, así
+que arranca sin deserializar nada y varios procesos comparten la misma copia
+en disco (y la caché de páginas del sistema operativo). Las instantáneas de
+este módulo exponen la misma interfaz que servicios.almacen.Instantanea.
+
+Uso:
+    python -m servicios.almacen_sqlite
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Mapping
+from functools import cached_property
+from pathlib import Path
+
+from servicios.almacen import huella_archivo, leer_json
+from servicios.facetas import MotorFacetas
+from servicios.sugerencias import IndiceSugerencias
+from servicios.normalizacion import normalizar
+from servicios.listados import h_index_numerico
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+REVISTAS_JSON = BASE_DIR / 'datos' / 'json' / 'revistas.json'
+SCIMAGOJR_JSON = BASE_DIR / 'datos' / 'json' / 'revistas_scimagojr.json'
+REVISTAS_DB = BASE_DIR / 'datos' / 'revistas.sqlite3'
+
+ESQUEMA = """
+CREATE TABLE revistas (
+    id INTEGER PRIMARY KEY,
+    titulo TEXT NOT NULL UNIQUE,
+    normalizado TEXT NOT NULL,
+    h_index INTEGER
+);
+CREATE TABLE areas (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE,
+    total INTEGER NOT NULL
+);
+CREATE TABLE catalogos (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE,
+    total INTEGER NOT NULL
+);
+CREATE TABLE revista_area (
+    area_id INTEGER NOT NULL REFERENCES areas(id),
+    revista_id INTEGER NOT NULL REFERENCES revistas(id),
+    posicion INTEGER NOT NULL,
+    PRIMARY KEY (area_id, revista_id)
+) WITHOUT ROWID;
+CREATE TABLE revista_catalogo (
+    catalogo_id INTEGER NOT NULL REFERENCES catalogos(id),
+    revista_id INTEGER NOT NULL REFERENCES revistas(id),
+    posicion INTEGER NOT NULL,
+    PRIMARY KEY (catalogo_id, revista_id)
+) WITHOUT ROWID;
+CREATE TABLE rankings (
+    tipo TEXT NOT NULL,
+    valor_id INTEGER NOT NULL,
+    rango INTEGER NOT NULL,
+    revista_id INTEGER NOT NULL REFERENCES revistas(id),
+    PRIMARY KEY (tipo, valor_id, rango)
+) WITHOUT ROWID;
+CREATE TABLE scimago (
+    titulo TEXT PRIMARY KEY,
+    h_index INTEGER,
+    publisher TEXT,
+    issn TEXT,
+    publication_type TEXT,
+    subject_area_category TEXT,
+    datos TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE metadatos (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+CREATE VIRTUAL TABLE revistas_palabras USING fts5(
+    normalizado, content='revistas', content_rowid='id', prefix='1 2 3'
+);
+CREATE VIRTUAL TABLE revistas_trigramas USING fts5(
+    normalizado, content='revistas', content_rowid='id', tokenize='trigram'
+);
+"""
+
+# Se crean después de la carga masiva, que así es bastante más rápida
+INDICES = """
+CREATE INDEX revistas_h_index ON revistas(h_index);
+CREATE INDEX revista_area_revista ON revista_area(revista_id);
+CREATE INDEX revista_catalogo_revista ON revista_catalogo(revista_id);
+INSERT INTO revistas_palabras(revistas_palabras) VALUES ('rebuild');
+INSERT INTO revistas_trigramas(revistas_trigramas) VALUES ('rebuild');
+ANALYZE;
+"""
+
+# Separador de group_concat: los nombres de área y catálogo pueden tener comas
+SEPARADOR = '\x1f'
+
+# Pertenencias de una revista: (tabla de relación, tabla de nombres, columna)
+RELACIONES = {
+    'area': ('revista_area', 'areas', 'area_id'),
+    'catalogo': ('revista_catalogo', 'catalogos', 'catalogo_id'),
+}
+
+# Cláusula ORDER BY de cada orden de listado. Igual que en ListadosRevistas,
+# las revistas sin H-Index quedan al final también en orden ascendente.
+ORDER_BY = {
+    ('titulo', False): 'r.titulo',
+    ('titulo', True): 'r.titulo DESC',
+    ('h_index', True): 'r.h_index IS NULL, r.h_index DESC, r.titulo',
+    ('h_index', False): 'r.h_index IS NULL, r.h_index, r.titulo DESC',
+}
+
+# Máximo de parámetros por consulta con IN (...)
+TAMANO_LOTE = 500
+
+
+def _valores(lista):
+    """Valores distintos de una lista conservando el orden de aparición."""
+    return list(dict.fromkeys(lista or []))
+
+
+def materializar(ruta_revistas, ruta_scimagojr, ruta_db):
+    """
+    Construye la base de datos a partir de los dos JSON.
+
+    Se escribe en un archivo temporal del mismo directorio y se reemplaza el
+    destino con un renombrado atómico, de modo que los procesos que ya la
+    tienen abierta siguen leyendo la versión anterior sin errores.
+    """
+    revistas = leer_json(ruta_revistas)
+    scimagojr = leer_json(ruta_scimagojr)
+
+    directorio = os.path.dirname(os.path.abspath(ruta_db))
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix='.tmp_', suffix='.sqlite3', dir=directorio)
+    os.close(fd)
+    try:
+        con = sqlite3.connect(temporal)
+        # El archivo temporal no necesita diario: si algo falla se descarta
+        con.execute('PRAGMA journal_mode = OFF')
+        con.execute('PRAGMA synchronous = OFF')
+        con.executescript(ESQUEMA)
+
+        h_index = {t: h_index_numerico(info or {}) for t, info in scimagojr.items()}
+        con.executemany(
+            'INSERT INTO revistas (id, titulo, normalizado, h_index) VALUES (?, ?, ?, ?)',
+            ((i, titulo, normalizar(titulo), h_index.get(titulo))
+             for i, titulo in enumerate(revistas, start=1)),
+        )
+
+        # Ids de las revistas con H-Index, de mayor a menor (a igualdad, por
+        # título): el ranking del catálogo completo (valor_id 0) y, filtrado,
+        # el de cada área y catálogo
+        titulos = list(revistas)
+        por_h = sorted((i for i, t in enumerate(titulos, start=1) if h_index.get(t) is not None),
+                       key=lambda i: (-h_index[titulos[i - 1]], titulos[i - 1]))
+        con.executemany('INSERT INTO rankings (tipo, valor_id, rango, revista_id) VALUES (?, ?, ?, ?)',
+                        (('todas', 0, rango, revista_id) for rango, revista_id in enumerate(por_h)))
+
+        for tipo, clave in (('area', 'areas'), ('catalogo', 'catalogos')):
+            relacion, tabla, columna = RELACIONES[tipo]
+            ids = {}
+            pares = []
+            for revista_id, info in enumerate(revistas.values(), start=1):
+                for posicion, valor in enumerate(_valores(info.get(clave))):
+                    pares.append((ids.setdefault(valor, len(ids) + 1), revista_id, posicion))
+            totales = {}
+            for valor_id, _, _ in pares:
+                totales[valor_id] = totales.get(valor_id, 0) + 1
+            con.executemany(f'INSERT INTO {tabla} (id, nombre, total) VALUES (?, ?, ?)',
+                            ((i, valor, totales[i]) for valor, i in ids.items()))
+            con.executemany(
+                f'INSERT INTO {relacion} ({columna}, revista_id, posicion) VALUES (?, ?, ?)', pares)
+
+            valores_revista = defaultdict(list)
+            for valor_id, revista_id, _ in pares:
+                valores_revista[revista_id].append(valor_id)
+            rangos = defaultdict(int)
+            filas = []
+            for revista_id in por_h:
+                for valor_id in valores_revista[revista_id]:
+                    filas.append((tipo, valor_id, rangos[valor_id], revista_id))
+                    rangos[valor_id] += 1
+            con.executemany('INSERT INTO rankings (tipo, valor_id, rango, revista_id) VALUES (?, ?, ?, ?)',
+                            filas)
+
+        con.executemany(
+            'INSERT INTO scimago (titulo, h_index, publisher, issn, publication_type, '
+            'subject_area_category, datos) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((titulo, h_index[titulo], info.get('publisher'), info.get('issn'),
+              info.get('publication_type'), info.get('subject_area_category'),
+              json.dumps(info, ensure_ascii=False))
+             for titulo, info in scimagojr.items() if isinstance(info, dict)),
+        )
+
+        con.executescript(INDICES)
+        con.executemany('INSERT INTO metadatos (clave, valor) VALUES (?, ?)', [
+            ('generado', time.strftime('%Y-%m-%dT%H:%M:%S')),
+            ('revistas', str(len(revistas))),
+            ('scimagojr', str(len(scimagojr))),
+        ])
+        con.commit()
+        con.close()
+
+        with open(temporal, 'rb') as f:
+            os.fsync(f.fileno())
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta_db)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return len(revistas), len(scimagojr)
+
+
+def conectar(ruta_db):
+    """Abre la base en solo lectura; las páginas se leen con mmap."""
+    uri = Path(ruta_db).resolve().as_uri() + '?mode=ro'
+    con = sqlite3.connect(uri, uri=True)
+    con.execute('PRAGMA query_only = ON')
+    con.execute('PRAGMA mmap_size = 268435456')
+    return con
+
+
+def _frase(texto):
+    """Cadena de FTS5 entre comillas; los textos normalizados no llevan comillas."""
+    return '"' + texto + '"'
+
+
+class RevistasSQLite(Mapping):
+    """revistas.json visto como diccionario título -> {'areas', 'catalogos'}."""
+
+    CONSULTA = f"""
+        SELECT r.h_index,
+               (SELECT group_concat(nombre, '{SEPARADOR}') FROM (
+                    SELECT a.nombre FROM revista_area m JOIN areas a ON a.id = m.area_id
+                    WHERE m.revista_id = r.id ORDER BY m.posicion)),
+               (SELECT group_concat(nombre, '{SEPARADOR}') FROM (
+                    SELECT c.nombre FROM revista_catalogo m JOIN catalogos c ON c.id = m.catalogo_id
+                    WHERE m.revista_id = r.id ORDER BY m.posicion))
+        FROM revistas r WHERE r.titulo = ?
+    """
+
+    def __init__(self, con):
+        self.con = con
+
+    def registro(self, titulo):
+        """(h_index, áreas, catálogos) de la revista o None si no existe."""
+        fila = self.con.execute(self.CONSULTA, (titulo,)).fetchone()
+        if fila is None:
+            return None
+        h_index, areas, catalogos = fila
+        return (h_index,
+                areas.split(SEPARADOR) if areas else [],
+                catalogos.split(SEPARADOR) if catalogos else [])
+
+    def __getitem__(self, titulo):
+        registro = self.registro(titulo)
+        if registro is None:
+            raise KeyError(titulo)
+        return {'areas': registro[1], 'catalogos': registro[2]}
+
+    def __contains__(self, titulo):
+        return self.con.execute('SELECT 1 FROM revistas WHERE titulo = ?', (titulo,)).fetchone() is not None
+
+    def __iter__(self):
+        for (titulo,) in self.con.execute('SELECT titulo FROM revistas ORDER BY id'):
+            yield titulo
+
+    def __len__(self):
+        return self.con.execute('SELECT count(*) FROM revistas').fetchone()[0]
+
+
+class ScimagoSQLite(Mapping):
+    """revistas_scimagojr.json visto como diccionario título -> datos de SCImago."""
+
+    def __init__(self, con):
+        self.con = con
+
+    def __getitem__(self, titulo):
+        fila = self.con.execute('SELECT datos FROM scimago WHERE titulo = ?', (titulo,)).fetchone()
+        if fila is None:
+            raise KeyError(titulo)
+        return json.loads(fila[0])
+
+    def __contains__(self, titulo):
+        return self.con.execute('SELECT 1 FROM scimago WHERE titulo = ?', (titulo,)).fetchone() is not None
+
+    def __iter__(self):
+        for (titulo,) in self.con.execute('SELECT titulo FROM scimago'):
+            yield titulo
+
+    def __len__(self):
+        return self.con.execute('SELECT count(*) FROM scimago').fetchone()[0]
+
+
+class IndicesSQLite:
+    """Misma interfaz que IndicesRevistas; las listas pequeñas se leen una vez."""
+
+    def __init__(self, con):
+        self.con = con
+        self.conteo_areas = dict(con.execute('SELECT nombre, total FROM areas'))
+        self.conteo_catalogos = dict(con.execute('SELECT nombre, total FROM catalogos'))
+        self.areas = sorted(self.conteo_areas)
+        self.catalogos = sorted(self.conteo_catalogos)
+
+    def _titulos(self, tipo, valor):
+        relacion, tabla, columna = RELACIONES[tipo]
+        filas = self.con.execute(
+            f'SELECT r.titulo FROM {relacion} m JOIN {tabla} v ON v.id = m.{columna} '
+            f'JOIN revistas r ON r.id = m.revista_id WHERE v.nombre = ? ORDER BY r.titulo', (valor,))
+        return [titulo for (titulo,) in filas]
+
+    def titulos_area(self, area):
+        return self._titulos('area', area)
+
+    def titulos_catalogo(self, catalogo):
+        return self._titulos('catalogo', catalogo)
+
+    def titulos_letra(self, prefijo):
+        """Títulos que empiezan con el prefijo dado (los títulos se guardan en minúsculas)."""
+        prefijo = prefijo.lower()
+        filas = self.con.execute(
+            'SELECT titulo FROM revistas WHERE titulo >= ? AND titulo < ? ORDER BY titulo',
+            (prefijo, prefijo + '\uffff'))
+        return [titulo for (titulo,) in filas]
+
+    def conteo_letra(self, prefijo):
+        prefijo = prefijo.lower()
+        return self.con.execute(
+            'SELECT count(*) FROM revistas WHERE titulo >= ? AND titulo < ?',
+            (prefijo, prefijo + '\uffff')).fetchone()[0]
+
+
+class BusquedaSQLite:
+    """Misma semántica y orden de relevancia que MotorBusqueda, resuelta con FTS5."""
+
+    def __init__(self, con):
+        self.con = con
+
+    def consulta_ids(self, consulta):
+        """
+        SQL (y parámetros) con los ids de las revistas que coinciden: todas las
+        palabras (la última como prefijo) o, desde tres caracteres, la consulta
+        completa como subcadena. None si la consulta queda vacía.
+        """
+        consulta = normalizar(consulta)
+        if not consulta:
+            return None
+        palabras = consulta.split()
+        expresion = ' '.join(_frase(p) for p in palabras) + '*'
+        sql = 'SELECT rowid FROM revistas_palabras WHERE revistas_palabras MATCH ?'
+        parametros = [expresion]
+        if len(consulta) >= 3:
+            sql += ' UNION SELECT rowid FROM revistas_trigramas WHERE revistas_trigramas MATCH ?'
+            parametros.append(_frase(consulta))
+        return sql, parametros
+
+    def coincidencias(self, consulta):
+        """Conjunto de títulos que coinciden con la consulta, sin ordenar."""
+        ids = self.consulta_ids(consulta)
+        if ids is None:
+            return set()
+        sql, parametros = ids
+        filas = self.con.execute(
+            f'SELECT r.titulo FROM revistas r WHERE r.id IN ({sql})', parametros)
+        return {titulo for (titulo,) in filas}
+
+    def buscar(self, consulta, limite=None):
+        """
+        Busca revistas por palabras (con prefijo) o por subcadena.
+
+        Returns:
+            tuple: (títulos ordenados por relevancia, total de coincidencias)
+        """
+        ids = self.consulta_ids(consulta)
+        if ids is None:
+            return [], 0
+        sql, parametros = ids
+        consulta = normalizar(consulta)
+        exactas = ' '.join(_frase(p) for p in consulta.split())
+        filas = self.con.execute(f"""
+            SELECT r.titulo, count(*) OVER () FROM revistas r
+            WHERE r.id IN ({sql})
+            ORDER BY CASE
+                WHEN r.normalizado >= ? AND r.normalizado < ? THEN 0
+                WHEN r.id IN (SELECT rowid FROM revistas_palabras WHERE revistas_palabras MATCH ?) THEN 1
+                ELSE 2 END,
+                length(r.normalizado), r.normalizado
+            LIMIT ?
+        """, parametros + [consulta, consulta + '\uffff', exactas, -1 if limite is None else limite]).fetchall()
+        if not filas:
+            return [], 0
+        return [titulo for titulo, _ in filas], filas[0][1]
+
+
+class ListadosSQLite:
+    """Misma interfaz que ListadosRevistas; el orden y el corte los hace SQLite."""
+
+    def __init__(self, con, revistas, busqueda):
+        self.con = con
+        self.revistas = revistas
+        self.busqueda = busqueda
+
+    def _origen(self, tipo, valor):
+        """FROM/WHERE de las revistas de un área, catálogo o letra inicial; None si no existe."""
+        if tipo == 'todas':
+            return 'FROM revistas r WHERE 1', []
+        if tipo == 'letra':
+            # Los títulos se guardan en minúsculas; el rango usa el índice de titulo
+            prefijo = valor.lower()
+            return 'FROM revistas r WHERE r.titulo >= ? AND r.titulo < ?', [prefijo, prefijo + '\uffff']
+        relacion, tabla, columna = RELACIONES[tipo]
+        fila = self.con.execute(f'SELECT id FROM {tabla} WHERE nombre = ?', (valor,)).fetchone()
+        if fila is None:
+            return None
+        return (f'FROM {relacion} m JOIN revistas r ON r.id = m.revista_id WHERE m.{columna} = ?',
+                [fila[0]])
+
+    def ordenados(self, tipo, valor=None, orden='h_index', descendente=True):
+        """Lista de títulos de un área/catálogo en el orden pedido; None si no existe."""
+        origen = self._origen(tipo, valor)
+        if origen is None:
+            return None
+        desde, parametros = origen
+        filas = self.con.execute(
+            f'SELECT r.titulo {desde} ORDER BY {ORDER_BY[(orden, descendente)]}', parametros)
+        return [titulo for (titulo,) in filas]
+
+    def top(self, tipo, valor=None, k=10):
+        """Las k revistas de mayor H-Index, leídas del ranking materializado; None si no existe."""
+        if tipo == 'todas':
+            valor_id = 0
+        else:
+            _, tabla, _ = RELACIONES[tipo]
+            fila = self.con.execute(f'SELECT id FROM {tabla} WHERE nombre = ?', (valor,)).fetchone()
+            if fila is None:
+                return None
+            valor_id = fila[0]
+        filas = self.con.execute(
+            'SELECT r.titulo FROM rankings k JOIN revistas r ON r.id = k.revista_id '
+            'WHERE k.tipo = ? AND k.valor_id = ? AND k.rango < ? ORDER BY k.rango',
+            (tipo, valor_id, k))
+        return [titulo for (titulo,) in filas]
+
+    def pagina(self, tipo, valor, orden, descendente, offset, limite, filtro=''):
+        """
+        Una página de un área/catálogo ya ordenada y filtrada.
+
+        Returns:
+            tuple: (títulos de la página, total, total tras filtrar) o None si no existe
+        """
+        origen = self._origen(tipo, valor)
+        if origen is None:
+            return None
+        desde, parametros = origen
+        total = self.con.execute(f'SELECT count(*) {desde}', parametros).fetchone()[0]
+
+        ids = self.busqueda.consulta_ids(filtro) if filtro else None
+        if ids is not None:
+            desde += f' AND r.id IN ({ids[0]})'
+            parametros = parametros + ids[1]
+        filas = self.con.execute(
+            f'SELECT r.titulo, count(*) OVER () {desde} '
+            f'ORDER BY {ORDER_BY[(orden, descendente)]} LIMIT ? OFFSET ?',
+            parametros + [limite, offset]).fetchall()
+        if filas:
+            filtrados = filas[0][1]
+        elif ids is None:
+            filtrados = total
+        else:
+            filtrados = self.con.execute(f'SELECT count(*) {desde}', parametros).fetchone()[0]
+        return [titulo for titulo, _ in filas], total, filtrados
+
+    def ordenar_por_h(self, titulos, descendente=True):
+        """Ordena cualquier lista de títulos por H-Index (sin H-Index al final)."""
+        h_index = {}
+        for i in range(0, len(titulos), TAMANO_LOTE):
+            lote = titulos[i:i + TAMANO_LOTE]
+            marcas = ', '.join('?' * len(lote))
+            h_index.update(self.con.execute(
+                f'SELECT titulo, h_index FROM revistas WHERE titulo IN ({marcas})', lote))
+        ordenados = sorted(titulos, key=lambda t: (h_index.get(t) is None, -(h_index.get(t) or 0), t))
+        if descendente:
+            return ordenados
+        con_h = sum(1 for t in ordenados if h_index.get(t) is not None)
+        return ordenados[:con_h][::-1] + ordenados[con_h:]
+
+    def fila(self, titulo):
+        """Representación JSON de una revista."""
+        registro = self.revistas.registro(titulo) or (None, [], [])
+        return {
+            'titulo': titulo,
+            'h_index': registro[0],
+            'areas': registro[1],
+            'catalogos': registro[2],
+        }
+
+
+class InstantaneaSQLite:
+    """
+    Vista de la base de datos con la interfaz de Instantanea.
+
+    Está ligada a la conexión de un hilo, así que no debe compartirse entre
+    hilos; cada petición la obtiene con AlmacenSQLite.instantanea(). Las
+    estructuras en memoria que no dependen de la conexión (facetas y
+    sugerencias) se piden a `compartidos`, que las construye una sola vez por
+    proceso y versión de los datos.
+    """
+
+    def __init__(self, con, version, compartidos):
+        self.version = version
+        self._compartidos = compartidos
+        self.revistas = RevistasSQLite(con)
+        self.scimagojr = ScimagoSQLite(con)
+        self.indices = IndicesSQLite(con)
+        self.busqueda = BusquedaSQLite(con)
+        self.listados = ListadosSQLite(con, self.revistas, self.busqueda)
+
+    @cached_property
+    def facetas(self):
+        # Los conjuntos de bits son de todo el proceso; las consultas de H-Index,
+        # letra y texto usan la conexión de este hilo
+        motor = self._compartidos.obtener(
+            self.version, 'facetas', lambda: MotorFacetas(self.indices, self.listados, self.busqueda))
+        return motor.ligar(self.indices, self.listados, self.busqueda)
+
+    @cached_property
+    def sugerencias(self):
+        return self._compartidos.obtener(
+            self.version, 'sugerencias',
+            lambda: IndiceSugerencias(self.listados.ordenados('todas', None, 'h_index', True)))
+
+
+class EstructurasCompartidas:
+    """Estructuras en memoria de una versión de los datos, compartidas por todos los hilos."""
+
+    def __init__(self):
+        self.version = None
+        self._estructuras = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, version, nombre, construir):
+        """La estructura `nombre` de la versión; la construye un solo hilo, los demás esperan."""
+        with self._lock:
+            if version != self.version:
+                # Datos nuevos: lo construido con la versión anterior se descarta
+                self._estructuras = {}
+                self.version = version
+            estructura = self._estructuras.get(nombre)
+            if estructura is None:
+                estructura = self._estructuras[nombre] = construir()
+            return estructura
+
+
+class AlmacenSQLite:
+    """Una conexión de solo lectura por hilo; se reabre cuando la base se reemplaza."""
+
+    def __init__(self, ruta_db, intervalo_revision=2.0):
+        self.ruta_db = ruta_db
+        self.intervalo_revision = intervalo_revision
+        self._local = threading.local()
+        self._compartidos = EstructurasCompartidas()
+
+    def _abrir(self, huella):
+        if huella is None:
+            raise FileNotFoundError(
+                f"No existe {self.ruta_db}; genérala con: python -m servicios.almacen_sqlite")
+        local = self._local
+        if getattr(local, 'con', None) is not None:
+            local.con.close()
+        local.con = conectar(self.ruta_db)
+        local.huella = huella
+        version = hashlib.sha1(repr(huella).encode('utf-8')).hexdigest()[:16]
+        local.instantanea = InstantaneaSQLite(local.con, version, self._compartidos)
+        return local.instantanea
+
+    def recargar(self):
+        """Reabre la conexión del hilo actual."""
+        return self._abrir(huella_archivo(self.ruta_db))
+
+    def instantanea(self):
+        """Instantánea del hilo actual, reabriendo la base si cambió en disco."""
+        local = self._local
+        actual = getattr(local, 'instantanea', None)
+        if actual is None:
+            local.ultima_revision = time.monotonic()
+            return self._abrir(huella_archivo(self.ruta_db))
+
+        ahora = time.monotonic()
+        if ahora - local.ultima_revision < self.intervalo_revision:
+            return actual
+        local.ultima_revision = ahora
+
+        huella = huella_archivo(self.ruta_db)
+        if huella is None or huella == local.huella:
+            # Si la base desaparece se sigue usando la conexión abierta
+            return actual
+        return self._abrir(huella)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera la base SQLite del catálogo de revistas')
+    parser.add_argument('--revistas', default=REVISTAS_JSON, help='Ruta de revistas.json')
+    parser.add_argument('--scimagojr', default=SCIMAGOJR_JSON, help='Ruta de revistas_scimagojr.json')
+    parser.add_argument('--salida', default=REVISTAS_DB, help='Ruta de la base de datos')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    total_revistas, total_scimagojr = materializar(args.revistas, args.scimagojr, args.salida)
+    print(f"Base generada en {args.salida}: {total_revistas} revistas, "
+          f"{total_scimagojr} de SCImago ({time.perf_counter() - inicio:.2f} s)")
+
+
+if __name__ == '__main__':
+    main()
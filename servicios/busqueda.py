@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de búsqueda de títulos de revistas.
+
+Mantiene dos índices invertidos sobre los títulos normalizados:
+
+- palabras: cada palabra apunta a las revistas que la contienen; el
+  vocabulario ordenado permite buscar por prefijo con bisect.
+- trigramas: cada secuencia de tres caracteres apunta a las revistas que la
+  contienen; sirve para conservar la búsqueda por subcadena sin recorrer
+  todo el catálogo.
+
+Las listas de ids de cada índice van juntas en un solo arreglo uint32, en el
+orden del vocabulario, con un arreglo de offsets (como las tablas de cadenas
+del catálogo binario). Así las palabras que empiezan con un prefijo ocupan
+un tramo contiguo, y el catálogo binario puede guardar el índice tal cual y
+usarlo desde el mmap sin construirlo en cada proceso.
+
+Las intersecciones empiezan por la lista más corta y buscan sus ids en las
+demás con searchsorted; las coincidencias se marcan en un arreglo booleano
+con una posición por revista. Los resultados se ordenan por relevancia y se
+limitan a los primeros N.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Sequence
+
+import numpy as np
+
+from servicios.normalizacion import normalizar
+
+
+def trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class ListasIds(Sequence):
+    """Listas de ids ordenadas, guardadas como offsets (n+1) y un arreglo con todos los ids."""
+
+    def __init__(self, indice, ids):
+        self.indice = indice
+        self.ids = ids
+
+    @classmethod
+    def desde_listas(cls, listas):
+        indice = np.zeros(len(listas) + 1, dtype='<u8')
+        if listas:
+            np.cumsum([len(lista) for lista in listas], out=indice[1:])
+        ids = np.fromiter((i for lista in listas for i in lista), dtype='<u4', count=int(indice[-1]))
+        return cls(indice, ids)
+
+    def __len__(self):
+        return len(self.indice) - 1
+
+    def __getitem__(self, i):
+        return self.ids[int(self.indice[i]):int(self.indice[i + 1])]
+
+    def tramo(self, inicio, fin):
+        """Ids de las listas inicio..fin-1 juntos (con repeticiones)."""
+        return self.ids[int(self.indice[inicio]):int(self.indice[fin])]
+
+
+class Permutacion(Sequence):
+    """Vista de una secuencia en el orden dado por un arreglo de posiciones."""
+
+    def __init__(self, valores, orden):
+        self.valores = valores
+        self.orden = orden
+
+    def __len__(self):
+        return len(self.orden)
+
+    def __getitem__(self, i):
+        return self.valores[int(self.orden[i])]
+
+
+def construir_indice(titulos):
+    """
+    Índice de búsqueda de una lista de títulos; el id de cada revista es su
+    posición en la lista.
+
+    Returns:
+        dict: normalizados, vocabulario y palabras (ListasIds), vocabulario de
+        trigramas y trigramas (ListasIds), alfabetico y orden (arreglos uint32)
+    """
+    normalizados = [normalizar(t) for t in titulos]
+
+    palabras = defaultdict(list)
+    tris = defaultdict(list)
+    for i, norm in enumerate(normalizados):
+        for palabra in set(norm.split()):
+            palabras[palabra].append(i)
+        for tri in trigramas(norm):
+            tris[tri].append(i)
+    vocabulario = sorted(palabras)
+    vocabulario_trigramas = sorted(tris)
+
+    # Títulos normalizados en orden alfabético: los que empiezan con la
+    # consulta forman un rango contiguo que se localiza con bisect
+    alfabetico = sorted(range(len(normalizados)), key=normalizados.__getitem__)
+
+    # Posición de cada título al ordenar por longitud y orden alfabético;
+    # desempata los resultados dentro de cada nivel de relevancia
+    orden = np.zeros(len(normalizados), dtype='<u4')
+    por_longitud = sorted(range(len(normalizados)), key=lambda i: (len(normalizados[i]), normalizados[i]))
+    orden[por_longitud] = np.arange(len(normalizados), dtype='<u4')
+
+    return {
+        'normalizados': normalizados,
+        'vocabulario': vocabulario,
+        'palabras': ListasIds.desde_listas([palabras[p] for p in vocabulario]),
+        'vocabulario_trigramas': vocabulario_trigramas,
+        'trigramas': ListasIds.desde_listas([tris[t] for t in vocabulario_trigramas]),
+        'alfabetico': np.array(alfabetico, dtype='<u4'),
+        'orden': orden,
+    }
+
+
+def _intersectar(listas):
+    """Intersección de listas de ids ordenadas, empezando por la más corta."""
+    listas = sorted(listas, key=len)
+    resultado = listas[0]
+    for lista in listas[1:]:
+        if not len(resultado):
+            break
+        posiciones = np.searchsorted(lista, resultado)
+        posiciones[posiciones == len(lista)] = 0
+        resultado = resultado[lista[posiciones] == resultado]
+    return resultado
+
+
+class MotorBusqueda:
+    """Índice de palabras y trigramas sobre los títulos del catálogo."""
+
+    def __init__(self, titulos, indice=None):
+        # indice: el de construir_indice, o el mismo leído del catálogo binario
+        self.titulos = titulos if indice is not None else list(titulos)
+        if indice is None:
+            indice = construir_indice(self.titulos)
+        self.normalizados = indice['normalizados']
+        self.vocabulario = indice['vocabulario']
+        self.palabras = indice['palabras']
+        self.vocabulario_trigramas = indice['vocabulario_trigramas']
+        self.trigramas = indice['trigramas']
+        self.alfabetico = indice['alfabetico']
+        self.orden = indice['orden']
+        self.normalizados_alfabetico = Permutacion(self.normalizados, self.alfabetico)
+
+    def _lista(self, vocabulario, listas, clave):
+        """Ids de la clave en un índice, o None si no está en el vocabulario."""
+        i = bisect_left(vocabulario, clave)
+        if i < len(vocabulario) and vocabulario[i] == clave:
+            return listas[i]
+        return None
+
+    def _marcas_prefijo(self, prefijo):
+        """Revistas con alguna palabra que empieza con el prefijo."""
+        marcas = np.zeros(len(self.titulos), dtype=bool)
+        # Las palabras con el prefijo son consecutivas en el vocabulario y sus ids también
+        inicio = bisect_left(self.vocabulario, prefijo)
+        fin = bisect_left(self.vocabulario, prefijo + '\uffff', inicio)
+        marcas[self.palabras.tramo(inicio, fin)] = True
+        return marcas
+
+    def _marcas_palabras(self, palabras):
+        """
+        Revistas que contienen las palabras de la consulta. La última palabra
+        se trata como prefijo porque normalmente el usuario no la ha terminado.
+        """
+        marcas = self._marcas_prefijo(palabras[-1])
+        if len(palabras) > 1:
+            exactos = self._ids_exactos(palabras[:-1])
+            filtro = np.zeros(len(marcas), dtype=bool)
+            filtro[exactos[marcas[exactos]]] = True
+            marcas = filtro
+        return marcas
+
+    def _ids_subcadena(self, consulta, excluir=None):
+        """
+        Revistas cuyo título normalizado contiene la consulta completa. Las
+        marcadas en `excluir` ya son coincidencias y no se comprueban.
+        """
+        if len(consulta) < 3:
+            return []
+        listas = [self._lista(self.vocabulario_trigramas, self.trigramas, t) for t in trigramas(consulta)]
+        if any(lista is None for lista in listas):
+            return []
+        candidatos = _intersectar(listas)
+        if excluir is not None:
+            candidatos = candidatos[~excluir[candidatos]]
+        # Los trigramas solo filtran; se confirma la subcadena real
+        normalizados = self.normalizados
+        return [i for i in candidatos.tolist() if consulta in normalizados[i]]
+
+    def _ids_exactos(self, palabras):
+        """Revistas que contienen todas las palabras completas de la consulta."""
+        listas = [self._lista(self.vocabulario, self.palabras, p) for p in palabras]
+        if any(lista is None for lista in listas):
+            return np.zeros(0, dtype='<u4')
+        return _intersectar(listas)
+
+    def _ids_inicio(self, consulta):
+        """Revistas cuyo título normalizado empieza con la consulta."""
+        lo = bisect_left(self.normalizados_alfabetico, consulta)
+        hi = bisect_left(self.normalizados_alfabetico, consulta + '\uffff', lo)
+        return self.alfabetico[lo:hi]
+
+    def _marcas(self, consulta, palabras):
+        marcas = self._marcas_palabras(palabras)
+        marcas[self._ids_subcadena(consulta, marcas)] = True
+        return marcas
+
+    def marcas_coincidencias(self, consulta):
+        """Arreglo booleano con True en las posiciones de las revistas que coinciden."""
+        consulta = normalizar(consulta)
+        if not consulta:
+            return np.zeros(len(self.titulos), dtype=bool)
+        return self._marcas(consulta, consulta.split())
+
+    def ids_coincidencias(self, consulta):
+        """Posiciones (en self.titulos) de las revistas que coinciden con la consulta."""
+        return set(np.flatnonzero(self.marcas_coincidencias(consulta)).tolist())
+
+    def coincidencias(self, consulta):
+        """Conjunto de títulos que coinciden con la consulta, sin ordenar."""
+        return {self.titulos[i] for i in self.ids_coincidencias(consulta)}
+
+    def _mejores(self, ids, n):
+        """Los n ids con menor posición en self.orden, ordenados."""
+        claves = self.orden[ids]
+        if n < len(ids):
+            elegidos = np.argpartition(claves, n)[:n]
+            ids, claves = ids[elegidos], claves[elegidos]
+        return ids[np.argsort(claves)].tolist()
+
+    def buscar(self, consulta, limite=None):
+        """
+        Busca revistas por palabras (con prefijo) o por subcadena.
+
+        El orden de relevancia es: títulos que empiezan con la consulta (el
+        título idéntico queda primero por ser el más corto), títulos con todas
+        las palabras completas y al final el resto de coincidencias parciales.
+        Dentro de cada nivel se prefieren los títulos más cortos, y de cada
+        nivel solo se ordenan los que caben en el límite.
+
+        Returns:
+            tuple: (títulos ordenados por relevancia, total de coincidencias)
+        """
+        consulta = normalizar(consulta)
+        if not consulta:
+            return [], 0
+        palabras = consulta.split()
+        pendientes = self._marcas(consulta, palabras)
+        total = int(np.count_nonzero(pendientes))
+        if limite is None:
+            limite = total
+
+        ordenados = []
+        for nivel in ('inicio', 'exactos', 'resto'):
+            faltan = limite - len(ordenados)
+            if faltan <= 0:
+                break
+            if nivel == 'inicio':
+                ids = self._ids_inicio(consulta)
+            elif nivel == 'exactos':
+                ids = self._ids_exactos(palabras)
+            else:
+                ids = np.flatnonzero(pendientes)
+            # Cada revista entra en el primer nivel que le corresponde
+            ids = ids[pendientes[ids]]
+            pendientes[ids] = False
+            ordenados.extend(self._mejores(ids, faltan))
+        return [self.titulos[i] for i in ordenados], total
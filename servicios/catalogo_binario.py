@@ -0,0 +1,533 @@
+# -*- coding: utf-8 -*-
+"""
+Catálogo de revistas en formato binario compacto y mapeado en memoria.
+
+Con varios procesos de gunicorn cada uno guarda su propio diccionario con
+todas las revistas y sus listas de cadenas. Este formato guarda lo mismo en
+columnas de tamaño fijo que se leen con mmap en solo lectura, así que todos
+los procesos comparten las mismas páginas físicas:
+
+- áreas y catálogos se internan como códigos y cada revista tiene una
+  máscara de bits (uint64) por tipo;
+- los títulos van en una tabla de cadenas ordenada (índice de offsets más
+  bytes UTF-8), y la posición en esa tabla es el id de la revista;
+- el H-Index es un arreglo int32 (-1 si no hay dato);
+- los datos de SCImago de cada revista van como JSON en otra tabla de cadenas;
+- el índice de búsqueda (títulos normalizados, vocabularios de palabras y
+  trigramas con sus listas de ids, orden alfabético y por longitud) se
+  guarda ya construido, así que los procesos no lo rearman en memoria;
+- el ranking por H-Index (solo revistas con H-Index) de todo el catálogo,
+  de cada área y de cada catálogo se guarda como listas de ids, así que
+  /api/top es una rebanada del mmap.
+
+Todas las secciones quedan alineadas a 8 bytes para leerlas con
+numpy.frombuffer sin copiarlas.
+
+Uso:
+    python -m servicios.catalogo_binario
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+from servicios.almacen import AlmacenRevistas, huella_archivo, leer_json
+from servicios.busqueda import ListasIds, MotorBusqueda, construir_indice
+from servicios.facetas import MotorFacetas
+from servicios.sugerencias import IndiceSugerencias
+from servicios.listados import h_index_numerico
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+REVISTAS_JSON = BASE_DIR / 'datos' / 'json' / 'revistas.json'
+SCIMAGOJR_JSON = BASE_DIR / 'datos' / 'json' / 'revistas_scimagojr.json'
+REVISTAS_CATALOGO = BASE_DIR / 'datos' / 'revistas.catalogo'
+
+MAGIA = b'REVCAT\x00\x00'
+VERSION_FORMATO = 3
+
+# Orden fijo de las secciones; la cabecera guarda (offset, longitud) de cada una
+SECCIONES = (
+    'areas_indice', 'areas',
+    'catalogos_indice', 'catalogos',
+    'titulos_indice', 'titulos',
+    'mascara_area', 'mascara_catalogo',
+    'h_index',
+    'scimago_indice', 'scimago',
+    'normalizados_indice', 'normalizados',
+    'vocabulario_indice', 'vocabulario',
+    'palabras_indice', 'palabras',
+    'vocabulario_trigramas_indice', 'vocabulario_trigramas',
+    'trigramas_indice', 'trigramas',
+    'alfabetico', 'orden',
+    'rankings_indice', 'rankings',
+)
+CABECERA = struct.Struct('<8sIIII' + 'QQ' * len(SECCIONES))
+
+# Una máscara uint64 por revista admite hasta 64 áreas y 64 catálogos
+MAX_VALORES = 64
+
+SIN_H_INDEX = -1
+
+
+def _tabla_cadenas(cadenas):
+    """Índice de offsets (uint64, n+1) y bytes UTF-8 concatenados."""
+    codificadas = [c.encode('utf-8') for c in cadenas]
+    indice = np.zeros(len(codificadas) + 1, dtype='<u8')
+    if codificadas:
+        np.cumsum([len(c) for c in codificadas], out=indice[1:])
+    return indice.tobytes(), b''.join(codificadas)
+
+
+def _codigos(revistas, clave):
+    """Código de cada valor distinto, en orden de primera aparición."""
+    codigos = {}
+    for info in revistas.values():
+        for valor in info.get(clave, []):
+            codigos.setdefault(valor, len(codigos))
+    if len(codigos) > MAX_VALORES:
+        raise ValueError(f"El formato admite hasta {MAX_VALORES} {clave}; hay {len(codigos)}")
+    return codigos
+
+
+def _ranking(ids, h_index):
+    """Ids con H-Index ordenados de mayor a menor; a igual H-Index, en orden alfabético."""
+    ids = ids[h_index[ids] != SIN_H_INDEX]
+    # np.lexsort usa la última clave como principal
+    return ids[np.lexsort((ids, -h_index[ids].astype(np.int64)))]
+
+
+def escribir_catalogo(revistas, scimagojr, ruta):
+    """Escribe el catálogo binario con un renombrado atómico."""
+    titulos = sorted(revistas)
+    codigos_area = _codigos(revistas, 'areas')
+    codigos_catalogo = _codigos(revistas, 'catalogos')
+
+    mascara_area = []
+    mascara_catalogo = []
+    h_index = []
+    scimago = []
+    for titulo in titulos:
+        info = revistas[titulo]
+        mascara_area.append(sum({1 << codigos_area[a] for a in info.get('areas', [])}))
+        mascara_catalogo.append(sum({1 << codigos_catalogo[c] for c in info.get('catalogos', [])}))
+        datos = scimagojr.get(titulo)
+        if isinstance(datos, dict):
+            h = h_index_numerico(datos)
+            h_index.append(SIN_H_INDEX if h is None else h)
+            scimago.append(json.dumps(datos, ensure_ascii=False))
+        else:
+            h_index.append(SIN_H_INDEX)
+            scimago.append('')
+
+    secciones = {}
+    secciones['areas_indice'], secciones['areas'] = _tabla_cadenas(codigos_area)
+    secciones['catalogos_indice'], secciones['catalogos'] = _tabla_cadenas(codigos_catalogo)
+    secciones['titulos_indice'], secciones['titulos'] = _tabla_cadenas(titulos)
+    secciones['mascara_area'] = np.array(mascara_area, dtype='<u8').tobytes()
+    secciones['mascara_catalogo'] = np.array(mascara_catalogo, dtype='<u8').tobytes()
+    secciones['h_index'] = np.array(h_index, dtype='<i4').tobytes()
+    secciones['scimago_indice'], secciones['scimago'] = _tabla_cadenas(scimago)
+
+    # Los ids del índice de búsqueda son las posiciones en la tabla de títulos
+    busqueda = construir_indice(titulos)
+    for nombre in ('normalizados', 'vocabulario', 'vocabulario_trigramas'):
+        secciones[nombre + '_indice'], secciones[nombre] = _tabla_cadenas(busqueda[nombre])
+    for nombre in ('palabras', 'trigramas'):
+        secciones[nombre + '_indice'] = busqueda[nombre].indice.tobytes()
+        secciones[nombre] = busqueda[nombre].ids.tobytes()
+    secciones['alfabetico'] = busqueda['alfabetico'].tobytes()
+    secciones['orden'] = busqueda['orden'].tobytes()
+
+    # Rankings en el orden de posicion_ranking: todas, áreas y catálogos por código
+    h = np.array(h_index, dtype=np.int64)
+    grupos = [np.arange(len(titulos))]
+    for mascaras, codigos in ((mascara_area, codigos_area), (mascara_catalogo, codigos_catalogo)):
+        mascaras = np.array(mascaras, dtype='<u8')
+        grupos.extend(np.flatnonzero(mascaras & np.uint64(1 << codigo)) for codigo in codigos.values())
+    rankings = ListasIds.desde_listas([_ranking(ids, h).tolist() for ids in grupos])
+    secciones['rankings_indice'] = rankings.indice.tobytes()
+    secciones['rankings'] = rankings.ids.tobytes()
+
+    # Se calcula la posición de cada sección, alineada a 8 bytes
+    posiciones = []
+    offset = CABECERA.size
+    for nombre in SECCIONES:
+        offset += -offset % 8
+        posiciones.extend((offset, len(secciones[nombre])))
+        offset += len(secciones[nombre])
+    cabecera = CABECERA.pack(MAGIA, VERSION_FORMATO, len(titulos),
+                             len(codigos_area), len(codigos_catalogo), *posiciones)
+
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix='.tmp_', suffix='.catalogo', dir=directorio)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(cabecera)
+            for nombre in SECCIONES:
+                f.write(b'\0' * (-f.tell() % 8))
+                f.write(secciones[nombre])
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return len(titulos)
+
+
+class TablaCadenas(Sequence):
+    """Tabla de cadenas sobre el mmap; solo se decodifican las que se piden."""
+
+    def __init__(self, datos, indice):
+        self._datos = datos
+        self._indice = indice
+
+    def __len__(self):
+        return len(self._indice) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self._datos[int(self._indice[i]):int(self._indice[i + 1])], 'utf-8')
+
+    def posicion(self, texto):
+        """Posición de la cadena en una tabla ordenada, o None si no está."""
+        i = bisect_left(self, texto)
+        if i < len(self) and self[i] == texto:
+            return i
+        return None
+
+    def rango_prefijo(self, prefijo):
+        """(inicio, fin) de las cadenas que empiezan con el prefijo en una tabla ordenada."""
+        inicio = bisect_left(self, prefijo)
+        return inicio, bisect_left(self, prefijo + '\uffff', inicio)
+
+
+class CatalogoBinario:
+    """Lector del catálogo: columnas numpy sobre un mmap de solo lectura."""
+
+    def __init__(self, ruta):
+        with open(ruta, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < CABECERA.size:
+            raise ValueError(f"Catálogo incompleto: {ruta}")
+        magia, version, total, total_areas, total_catalogos, *posiciones = CABECERA.unpack_from(self._mmap)
+        if magia != MAGIA or version != VERSION_FORMATO:
+            raise ValueError(f"Formato de catálogo no reconocido: {ruta}")
+        self._secciones = {nombre: (posiciones[2 * i], posiciones[2 * i + 1])
+                           for i, nombre in enumerate(SECCIONES)}
+
+        self.titulos = self._tabla('titulos')
+        self.areas = self._tabla('areas')
+        self.catalogos = self._tabla('catalogos')
+        self.scimago = self._tabla('scimago')
+        self.mascara_area = self._arreglo('mascara_area', '<u8')
+        self.mascara_catalogo = self._arreglo('mascara_catalogo', '<u8')
+        self.h_index = self._arreglo('h_index', '<i4')
+        self.rankings = ListasIds(self._arreglo('rankings_indice', '<u8'), self._arreglo('rankings', '<u4'))
+        if not (len(self.titulos) == len(self.mascara_area) == len(self.h_index)
+                == len(self._arreglo('orden', '<u4')) == total
+                and len(self.areas) == total_areas and len(self.catalogos) == total_catalogos
+                and len(self.rankings) == 1 + total_areas + total_catalogos):
+            raise ValueError(f"Catálogo inconsistente: {ruta}")
+
+    def _arreglo(self, nombre, tipo):
+        offset, longitud = self._secciones[nombre]
+        return np.frombuffer(self._mmap, dtype=tipo, count=longitud // np.dtype(tipo).itemsize, offset=offset)
+
+    def _tabla(self, nombre):
+        offset, longitud = self._secciones[nombre]
+        datos = memoryview(self._mmap)[offset:offset + longitud]
+        return TablaCadenas(datos, self._arreglo(nombre + '_indice', '<u8'))
+
+    def __len__(self):
+        return len(self.titulos)
+
+    def valores(self, tipo):
+        return self.areas if tipo == 'area' else self.catalogos
+
+    def mascaras(self, tipo):
+        return self.mascara_area if tipo == 'area' else self.mascara_catalogo
+
+    def decodificar(self, tipo, i):
+        """Nombres de las áreas o catálogos de la revista i."""
+        mascara = int(self.mascaras(tipo)[i])
+        valores = self.valores(tipo)
+        return [valores[bit] for bit in range(len(valores)) if mascara >> bit & 1]
+
+    def ids(self, tipo, valor):
+        """Ids (ya en orden alfabético) de las revistas de un área o catálogo; None si no existe."""
+        valores = self.valores(tipo)
+        if valor not in valores:
+            return None
+        bit = np.uint64(1 << valores.index(valor))
+        return np.flatnonzero(self.mascaras(tipo) & bit)
+
+    def ranking(self, tipo, valor=None):
+        """Ids con H-Index de todo el catálogo o de un área/catálogo, por H-Index; None si no existe."""
+        if tipo == 'todas':
+            return self.rankings[0]
+        valores = self.valores(tipo)
+        if valor not in valores:
+            return None
+        posicion = 1 + valores.index(valor)
+        if tipo == 'catalogo':
+            posicion += len(self.areas)
+        return self.rankings[posicion]
+
+    def h(self, i):
+        h = int(self.h_index[i])
+        return None if h == SIN_H_INDEX else h
+
+    def indice_busqueda(self):
+        """Índice de búsqueda guardado, con la forma que devuelve construir_indice."""
+        return {
+            'normalizados': self._tabla('normalizados'),
+            'vocabulario': self._tabla('vocabulario'),
+            'palabras': ListasIds(self._arreglo('palabras_indice', '<u8'), self._arreglo('palabras', '<u4')),
+            'vocabulario_trigramas': self._tabla('vocabulario_trigramas'),
+            'trigramas': ListasIds(self._arreglo('trigramas_indice', '<u8'), self._arreglo('trigramas', '<u4')),
+            'alfabetico': self._arreglo('alfabetico', '<u4'),
+            'orden': self._arreglo('orden', '<u4'),
+        }
+
+
+class RevistasBinarias(Mapping):
+    """revistas.json visto como diccionario título -> {'areas', 'catalogos'}."""
+
+    def __init__(self, catalogo):
+        self.catalogo = catalogo
+
+    def __getitem__(self, titulo):
+        i = self.catalogo.titulos.posicion(titulo)
+        if i is None:
+            raise KeyError(titulo)
+        return {'areas': self.catalogo.decodificar('area', i),
+                'catalogos': self.catalogo.decodificar('catalogo', i)}
+
+    def __contains__(self, titulo):
+        return self.catalogo.titulos.posicion(titulo) is not None
+
+    def __iter__(self):
+        return iter(self.catalogo.titulos)
+
+    def __len__(self):
+        return len(self.catalogo)
+
+
+class ScimagoBinario(Mapping):
+    """Datos de SCImago de las revistas del catálogo."""
+
+    def __init__(self, catalogo):
+        self.catalogo = catalogo
+
+    def __getitem__(self, titulo):
+        i = self.catalogo.titulos.posicion(titulo)
+        texto = self.catalogo.scimago[i] if i is not None else ''
+        if not texto:
+            raise KeyError(titulo)
+        return json.loads(texto)
+
+    def __iter__(self):
+        return (t for i, t in enumerate(self.catalogo.titulos) if self.catalogo.scimago[i])
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class IndicesBinarios:
+    """Misma interfaz que IndicesRevistas, calculada con las máscaras de bits."""
+
+    def __init__(self, catalogo):
+        self.catalogo = catalogo
+        self.areas = sorted(catalogo.areas)
+        self.catalogos = sorted(catalogo.catalogos)
+        self.conteo_areas = {a: len(catalogo.ids('area', a)) for a in self.areas}
+        self.conteo_catalogos = {c: len(catalogo.ids('catalogo', c)) for c in self.catalogos}
+
+    def _titulos(self, tipo, valor):
+        ids = self.catalogo.ids(tipo, valor)
+        if ids is None:
+            return []
+        return [self.catalogo.titulos[i] for i in ids]
+
+    def titulos_area(self, area):
+        return self._titulos('area', area)
+
+    def titulos_catalogo(self, catalogo):
+        return self._titulos('catalogo', catalogo)
+
+    def titulos_letra(self, prefijo):
+        """Títulos que empiezan con el prefijo dado (los títulos se guardan en minúsculas)."""
+        inicio, fin = self.catalogo.titulos.rango_prefijo(prefijo.lower())
+        return self.catalogo.titulos[inicio:fin]
+
+    def conteo_letra(self, prefijo):
+        inicio, fin = self.catalogo.titulos.rango_prefijo(prefijo.lower())
+        return fin - inicio
+
+
+class ListadosBinarios:
+    """Misma interfaz que ListadosRevistas; los órdenes se calculan con numpy por petición."""
+
+    def __init__(self, catalogo, busqueda):
+        self.catalogo = catalogo
+        self.busqueda = busqueda
+
+    def _ordenar(self, ids, orden, descendente):
+        """Ordena ids (que ya vienen en orden alfabético) por título o por H-Index."""
+        if orden == 'titulo':
+            return ids[::-1] if descendente else ids
+        h = self.catalogo.h_index[ids]
+        sin_h = h == SIN_H_INDEX
+        if descendente:
+            # np.lexsort usa la última clave como principal
+            return ids[np.lexsort((ids, -h.astype(np.int64), sin_h))]
+        # Ascendente (a igual H-Index, alfabético inverso), pero las revistas
+        # sin H-Index siguen al final y en orden alfabético
+        desempate = np.where(sin_h, ids, -ids.astype(np.int64))
+        return ids[np.lexsort((desempate, h, sin_h))]
+
+    def _ids(self, tipo, valor):
+        if tipo == 'todas':
+            return np.arange(len(self.catalogo))
+        if tipo == 'letra':
+            # Los ids son posiciones en la tabla ordenada: un prefijo es un rango
+            return np.arange(*self.catalogo.titulos.rango_prefijo(valor.lower()))
+        return self.catalogo.ids(tipo, valor)
+
+    def ordenados(self, tipo, valor=None, orden='h_index', descendente=True):
+        """Lista de títulos de un área/catálogo en el orden pedido; None si no existe."""
+        ids = self._ids(tipo, valor)
+        if ids is None:
+            return None
+        return [self.catalogo.titulos[i] for i in self._ordenar(ids, orden, descendente)]
+
+    def pagina(self, tipo, valor, orden, descendente, offset, limite, filtro=''):
+        """
+        Una página de un área/catálogo ya ordenada y filtrada.
+
+        Returns:
+            tuple: (títulos de la página, total, total tras filtrar) o None si no existe
+        """
+        ids = self._ids(tipo, valor)
+        if ids is None:
+            return None
+        total = len(ids)
+        if filtro:
+            # Los ids del motor de búsqueda son las posiciones en la tabla de títulos
+            ids = ids[self.busqueda.marcas_coincidencias(filtro)[ids]]
+        ordenados = self._ordenar(ids, orden, descendente)
+        pagina = [self.catalogo.titulos[i] for i in ordenados[offset:offset + limite]]
+        return pagina, total, len(ordenados)
+
+    def top(self, tipo, valor=None, k=10):
+        """Las k revistas de mayor H-Index (solo las que lo tienen); None si no existe."""
+        # Rankings precalculados al generar el catálogo
+        ranking = self.catalogo.ranking(tipo, valor)
+        if ranking is None:
+            return None
+        return [self.catalogo.titulos[i] for i in ranking[:k]]
+
+    def ordenar_por_h(self, titulos, descendente=True):
+        """Ordena cualquier lista de títulos por H-Index (sin H-Index al final)."""
+        posicion = self.catalogo.titulos.posicion
+        ids = np.array(sorted(posicion(t) for t in titulos), dtype=np.int64)
+        return [self.catalogo.titulos[i] for i in self._ordenar(ids, 'h_index', descendente)]
+
+    def fila(self, titulo):
+        """Representación JSON de una revista."""
+        i = self.catalogo.titulos.posicion(titulo)
+        if i is None:
+            return {'titulo': titulo, 'h_index': None, 'areas': [], 'catalogos': []}
+        return {
+            'titulo': titulo,
+            'h_index': self.catalogo.h(i),
+            'areas': self.catalogo.decodificar('area', i),
+            'catalogos': self.catalogo.decodificar('catalogo', i),
+        }
+
+
+class InstantaneaBinaria:
+    """Vista del catálogo binario con la interfaz de Instantanea; se comparte entre hilos."""
+
+    def __init__(self, catalogo, version):
+        self.version = version
+        self.catalogo = catalogo
+        self.revistas = RevistasBinarias(catalogo)
+        self.scimagojr = ScimagoBinario(catalogo)
+        self.indices = IndicesBinarios(catalogo)
+        # El índice se lee del mmap; los ids son las posiciones en la tabla de títulos
+        self.busqueda = MotorBusqueda(catalogo.titulos, catalogo.indice_busqueda())
+        self.listados = ListadosBinarios(catalogo, self.busqueda)
+
+    @cached_property
+    def facetas(self):
+        # Se construye con la primera consulta facetada
+        return MotorFacetas(self.indices, self.listados, self.busqueda)
+
+    @cached_property
+    def sugerencias(self):
+        # Se construye con la primera petición de autocompletado
+        return IndiceSugerencias(self.listados.ordenados('todas', None, 'h_index', True))
+
+
+class AlmacenBinario(AlmacenRevistas):
+    """Como AlmacenRevistas, pero la instantánea se lee del catálogo binario."""
+
+    def __init__(self, ruta_catalogo, intervalo_revision=2.0):
+        super().__init__(ruta_catalogo, None, intervalo_revision)
+        self.ruta_catalogo = ruta_catalogo
+
+    def _huellas_actuales(self):
+        return (huella_archivo(self.ruta_catalogo),)
+
+    def _cargar(self, huellas):
+        if huellas[0] is None:
+            raise FileNotFoundError(
+                f"No existe {self.ruta_catalogo}; genéralo con: python -m servicios.catalogo_binario")
+        version = hashlib.sha1(repr(huellas).encode('utf-8')).hexdigest()[:16]
+        instantanea = InstantaneaBinaria(CatalogoBinario(self.ruta_catalogo), version)
+        self._huellas = huellas
+        self._instantanea = instantanea
+        return instantanea
+
+
+def generar_catalogo(ruta_revistas, ruta_scimagojr, ruta_catalogo):
+    """Lee los dos JSON y escribe el catálogo binario."""
+    return escribir_catalogo(leer_json(ruta_revistas), leer_json(ruta_scimagojr), ruta_catalogo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera el catálogo binario de revistas')
+    parser.add_argument('--revistas', default=REVISTAS_JSON, help='Ruta de revistas.json')
+    parser.add_argument('--scimagojr', default=SCIMAGOJR_JSON, help='Ruta de revistas_scimagojr.json')
+    parser.add_argument('--salida', default=REVISTAS_CATALOGO, help='Ruta del catálogo binario')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    total = generar_catalogo(args.revistas, args.scimagojr, args.salida)
+    print(f"Catálogo generado en {args.salida}: {total} revistas, "
+          f"{os.path.getsize(args.salida) / 1e6:.1f} MB ({time.perf_counter() - inicio:.2f} s)")
+
+
+if __name__ == '__main__':
+    main()
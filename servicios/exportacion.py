@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación de listados de revistas en CSV y JSON Lines.
+
+Cada fila se arma al momento uniendo los datos de revistas.json con los de
+SCImago, y las filas se envían en bloques a medida que se generan: la
+memoria no crece con el tamaño del listado y la descarga empieza antes de
+terminar de leer el catálogo.
+"""
+
+import csv
+import io
+import json
+
+COLUMNAS = ('titulo', 'h_index', 'areas', 'catalogos', 'publisher', 'issn', 'publication_type',
+            'subject_area_category', 'site', 'url_scimago')
+
+# Filas que se acumulan antes de enviar un bloque
+FILAS_POR_BLOQUE = 256
+
+# Formato -> tipo MIME de la respuesta
+FORMATOS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def filas_revistas(instantanea, titulos):
+    """Genera un diccionario por revista con sus datos y los de SCImago."""
+    listados = instantanea.listados
+    scimagojr = instantanea.scimagojr
+    for titulo in titulos:
+        fila = listados.fila(titulo)
+        info = scimagojr.get(titulo) or {}
+        yield {
+            'titulo': titulo,
+            'h_index': fila['h_index'],
+            'areas': fila['areas'],
+            'catalogos': fila['catalogos'],
+            'publisher': info.get('publisher'),
+            'issn': info.get('issn'),
+            'publication_type': info.get('publication_type'),
+            'subject_area_category': info.get('subject_area_category'),
+            'site': info.get('site'),
+            'url_scimago': info.get('url'),
+        }
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, list):
+        return '; '.join(valor)
+    return valor
+
+
+def exportar_csv(filas):
+    """Genera el CSV en bloques; el encabezado sale de inmediato."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUMNAS)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for n, fila in enumerate(filas, start=1):
+        escritor.writerow([_valor_csv(fila[columna]) for columna in COLUMNAS])
+        if n % FILAS_POR_BLOQUE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def exportar_jsonl(filas):
+    """Genera una línea JSON por revista, en bloques."""
+    lineas = []
+    for fila in filas:
+        lineas.append(json.dumps(fila, ensure_ascii=False))
+        if len(lineas) == FILAS_POR_BLOQUE:
+            yield '\n'.join(lineas) + '\n'
+            lineas = []
+    if lineas:
+        yield '\n'.join(lineas) + '\n'
+
+
+EXPORTADORES = {
+    'csv': exportar_csv,
+    'jsonl': exportar_jsonl,
+}
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Consultas facetadas: combinan área, catálogo, rango de H-Index, letra
+inicial y texto del título en una sola consulta.
+
+Cada área y cada catálogo se representa como un conjunto de bits (un
+entero de Python) sobre los ids de las revistas, así que combinar filtros es
+un AND/OR de enteros y contar las revistas de cada valor es un bit_count.
+Los ids son las posiciones en el orden global por H-Index descendente (sin
+H-Index al final): un rango de H-Index es un bloque contiguo de bits y los
+resultados salen ya ordenados por H-Index.
+
+Se construye a partir de la interfaz común de las instantáneas (índices,
+listados y búsqueda), así que sirve igual con los tres almacenes. Los
+conjuntos de bits no dependen de la conexión con que se construyeron: con
+SQLite se calculan una vez por versión de los datos y cada hilo los liga a
+sus propios índices, listados y búsqueda con ligar().
+"""
+
+import copy
+from bisect import bisect_left, bisect_right
+
+# Posiciones de los bits encendidos de cada valor de un byte
+_BITS_BYTE = [tuple(i for i in range(8) if byte >> i & 1) for byte in range(256)]
+
+
+def conjunto_bits(posiciones, total):
+    """Entero con un bit encendido por cada posición."""
+    buffer = bytearray((total + 7) // 8)
+    for p in posiciones:
+        buffer[p >> 3] |= 1 << (p & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class MotorFacetas:
+    """Conjuntos de bits por área y catálogo sobre el orden global por H-Index."""
+
+    def __init__(self, indices, listados, busqueda):
+        self.indices = indices
+        self.listados = listados
+        self.busqueda = busqueda
+        self.titulos = listados.ordenados('todas', None, 'h_index', True)
+        self.ids = {t: i for i, t in enumerate(self.titulos)}
+        self.todas = (1 << len(self.titulos)) - 1
+
+        self.areas = {a: self._bits(indices.titulos_area(a)) for a in indices.areas}
+        self.catalogos = {c: self._bits(indices.titulos_catalogo(c)) for c in indices.catalogos}
+        # Las revistas sin H-Index empiezan en esta posición
+        self.con_h = self._posicion_h()
+
+    def _bits(self, titulos):
+        ids = self.ids
+        return conjunto_bits((ids[t] for t in titulos if t in ids), len(self.titulos))
+
+    def _clave_h(self, titulo):
+        # Creciente a lo largo del orden global: -H-Index y las revistas sin H-Index al final
+        h = self.listados.fila(titulo)['h_index']
+        return float('inf') if h is None else -h
+
+    def _posicion_h(self, minimo=None):
+        """Número de revistas con H-Index >= minimo (o con H-Index, sin mínimo); es un prefijo."""
+        if minimo is None:
+            return bisect_left(self.titulos, float('inf'), key=self._clave_h)
+        return bisect_right(self.titulos, -minimo, key=self._clave_h)
+
+    def ligar(self, indices, listados, busqueda):
+        """Copia que comparte los conjuntos de bits y consulta otros índices, listados y búsqueda."""
+        motor = copy.copy(self)
+        motor.indices = indices
+        motor.listados = listados
+        motor.busqueda = busqueda
+        return motor
+
+    def rango_h(self, h_min=None, h_max=None):
+        """Bits de las revistas con h_min <= H-Index <= h_max."""
+        fin = self._posicion_h(h_min) if h_min is not None else self.con_h
+        inicio = self._posicion_h(h_max + 1) if h_max is not None else 0
+        if inicio >= fin:
+            return 0
+        return ((1 << fin) - 1) & ~((1 << inicio) - 1)
+
+    def _union(self, bits, valores):
+        resultado = 0
+        for valor in valores:
+            resultado |= bits.get(valor, 0)
+        return resultado
+
+    def consultar(self, areas=(), catalogos=(), h_min=None, h_max=None, letra='', texto=''):
+        """
+        Aplica los filtros: los valores de una misma faceta se combinan con OR
+        y las facetas entre sí con AND.
+
+        Las cuentas de cada área se calculan con todos los filtros excepto el
+        de áreas (y lo mismo para catálogos), para saber cuántas revistas
+        quedarían al agregar o cambiar un valor.
+
+        Returns:
+            tuple: (bits del resultado, {'areas': {área: n}, 'catalogos': {catálogo: n}})
+        """
+        base = self.todas
+        if h_min is not None or h_max is not None:
+            base &= self.rango_h(h_min, h_max)
+        if letra:
+            base &= self._bits(self.indices.titulos_letra(letra))
+        if texto:
+            base &= self._bits(self.busqueda.coincidencias(texto))
+
+        filtro_areas = self._union(self.areas, areas) if areas else self.todas
+        filtro_catalogos = self._union(self.catalogos, catalogos) if catalogos else self.todas
+
+        sin_areas = base & filtro_catalogos
+        sin_catalogos = base & filtro_areas
+        conteos = {
+            'areas': {a: (sin_areas & bits).bit_count() for a, bits in self.areas.items()},
+            'catalogos': {c: (sin_catalogos & bits).bit_count() for c, bits in self.catalogos.items()},
+        }
+        return sin_areas & filtro_areas, conteos
+
+    def ids_resultado(self, bits):
+        """Posiciones de los bits encendidos, en orden (H-Index descendente)."""
+        datos = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+        return [8 * j + i for j, byte in enumerate(datos) if byte for i in _BITS_BYTE[byte]]
+
+    def ordenados(self, bits, orden='h_index', descendente=True):
+        """Títulos del resultado en el orden pedido."""
+        ids = self.ids_resultado(bits)
+        if orden == 'titulo':
+            return sorted((self.titulos[i] for i in ids), reverse=descendente)
+        if not descendente:
+            # Ascendente, pero las revistas sin H-Index siguen al final
+            con_h = bisect_left(ids, self.con_h)
+            ids = ids[:con_h][::-1] + ids[con_h:]
+        titulos = self.titulos
+        return [titulos[i] for i in ids]
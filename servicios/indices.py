@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Índices secundarios del catálogo de revistas.
+
+Se construyen una vez por instantánea para que las páginas de área, catálogo
+y letra inicial respondan en tiempo proporcional al resultado y no al
+tamaño completo del catálogo.
+"""
+
+from collections import defaultdict
+
+
+class IndicesRevistas:
+    """Agrupa los títulos por área, catálogo y letra inicial."""
+
+    def __init__(self, revistas):
+        por_area = defaultdict(list)
+        por_catalogo = defaultdict(list)
+        por_letra = defaultdict(list)
+
+        for titulo, info in revistas.items():
+            for area in info.get('areas', []):
+                por_area[area].append(titulo)
+            for catalogo in info.get('catalogos', []):
+                por_catalogo[catalogo].append(titulo)
+            por_letra[titulo[:1].lower()].append(titulo)
+
+        self.por_area = {area: sorted(titulos) for area, titulos in por_area.items()}
+        self.por_catalogo = {cat: sorted(titulos) for cat, titulos in por_catalogo.items()}
+        self.por_letra = {letra: sorted(titulos) for letra, titulos in por_letra.items()}
+
+        # Listas de valores distintos con su número de revistas
+        self.areas = sorted(self.por_area)
+        self.catalogos = sorted(self.por_catalogo)
+        self.conteo_areas = {area: len(t) for area, t in self.por_area.items()}
+        self.conteo_catalogos = {cat: len(t) for cat, t in self.por_catalogo.items()}
+
+    def titulos_area(self, area):
+        return self.por_area.get(area, [])
+
+    def titulos_catalogo(self, catalogo):
+        return self.por_catalogo.get(catalogo, [])
+
+    def titulos_letra(self, prefijo):
+        """Títulos que empiezan con el prefijo dado (sin distinguir mayúsculas)."""
+        prefijo = prefijo.lower()
+        candidatos = self.por_letra.get(prefijo[:1], [])
+        if len(prefijo) <= 1:
+            return candidatos
+        return [t for t in candidatos if t.lower().startswith(prefijo)]
+
+    def conteo_letra(self, prefijo):
+        return len(self.titulos_letra(prefijo))
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Listados paginados de revistas para la API JSON.
+
+Para cada área y catálogo se precalculan los órdenes por título y por
+H-Index (ascendente y descendente), así una página de resultados se obtiene
+con un corte de lista en lugar de ordenar todo el catálogo en cada petición.
+Las k revistas de mayor H-Index son el inicio del orden descendente. Lo mismo
+se hace para cada letra inicial; un prefijo más largo filtra los órdenes de
+su letra.
+"""
+
+ORDENES = ('titulo', 'h_index')
+
+
+def h_index_numerico(info):
+    """Convierte el H-Index de SCImago a entero; None si falta o no es numérico."""
+    try:
+        return int(str(info.get('h_index')).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+class ListadosRevistas:
+    """Órdenes precalculados por área, catálogo, letra inicial y para el catálogo completo."""
+
+    def __init__(self, revistas, scimagojr, indices, busqueda):
+        self.revistas = revistas
+        self.scimagojr = scimagojr
+        self.busqueda = busqueda
+        self.h_index = {t: h_index_numerico(scimagojr.get(t, {})) for t in revistas}
+
+        # Posición global de cada título: H-Index descendente y, a igualdad,
+        # orden alfabético. Las revistas sin H-Index quedan al final.
+        por_h = sorted(revistas, key=lambda t: (self.h_index[t] is None, -(self.h_index[t] or 0), t))
+        self._rango_h = {t: i for i, t in enumerate(por_h)}
+
+        self._ordenes = {}
+        # Revistas con H-Index de cada listado: el ranking termina ahí
+        self._con_h = {}
+        self._registrar(('todas', None), sorted(revistas))
+        for area, titulos in indices.por_area.items():
+            self._registrar(('area', area), titulos)
+        for catalogo, titulos in indices.por_catalogo.items():
+            self._registrar(('catalogo', catalogo), titulos)
+        for letra, titulos in indices.por_letra.items():
+            self._registrar(('letra', letra), titulos)
+
+    def _registrar(self, clave, titulos_alfabeticos):
+        por_h = self.ordenar_por_h(titulos_alfabeticos)
+        con_h = sum(1 for t in por_h if self.h_index[t] is not None)
+        self._con_h[clave] = con_h
+        self._ordenes[clave] = {
+            ('titulo', False): titulos_alfabeticos,
+            ('titulo', True): titulos_alfabeticos[::-1],
+            ('h_index', True): por_h,
+            # Ascendente, pero las revistas sin H-Index siguen al final
+            ('h_index', False): por_h[:con_h][::-1] + por_h[con_h:],
+        }
+
+    def ordenar_por_h(self, titulos, descendente=True):
+        """Ordena cualquier lista de títulos por H-Index usando el rango global."""
+        ordenados = sorted(titulos, key=self._rango_h.__getitem__)
+        if descendente:
+            return ordenados
+        con_h = sum(1 for t in ordenados if self.h_index[t] is not None)
+        return ordenados[:con_h][::-1] + ordenados[con_h:]
+
+    def ordenados(self, tipo, valor=None, orden='h_index', descendente=True):
+        """Lista de títulos de un área/catálogo en el orden pedido; None si no existe."""
+        if tipo == 'letra':
+            return self._ordenados_letra(valor.lower(), orden, descendente)
+        ordenes = self._ordenes.get((tipo, valor))
+        if ordenes is None:
+            return None
+        return ordenes[(orden, descendente)]
+
+    def _ordenados_letra(self, prefijo, orden, descendente):
+        """Títulos que empiezan con el prefijo; una letra sin revistas da una lista vacía."""
+        ordenes = self._ordenes.get(('letra', prefijo[:1]))
+        if ordenes is None:
+            return []
+        titulos = ordenes[(orden, descendente)]
+        if len(prefijo) > 1:
+            titulos = [t for t in titulos if t.lower().startswith(prefijo)]
+        return titulos
+
+    def top(self, tipo, valor=None, k=10):
+        """Las k revistas de mayor H-Index (solo las que lo tienen); None si no existe."""
+        ordenes = self._ordenes.get((tipo, valor))
+        if ordenes is None:
+            return None
+        return ordenes[('h_index', True)][:min(k, self._con_h[(tipo, valor)])]
+
+    def pagina(self, tipo, valor, orden, descendente, offset, limite, filtro=''):
+        """
+        Una página de un área/catálogo ya ordenada y filtrada.
+
+        Returns:
+            tuple: (títulos de la página, total, total tras filtrar) o None si no existe
+        """
+        titulos = self.ordenados(tipo, valor, orden, descendente)
+        if titulos is None:
+            return None
+        coincidencias = self.busqueda.coincidencias(filtro) if filtro else None
+        pagina, filtrados = paginar(titulos, offset, limite, coincidencias)
+        return pagina, len(titulos), filtrados
+
+    def fila(self, titulo):
+        """Representación JSON de una revista."""
+        info = self.revistas.get(titulo, {})
+        return {
+            'titulo': titulo,
+            'h_index': self.h_index.get(titulo),
+            'areas': info.get('areas', []),
+            'catalogos': info.get('catalogos', []),
+        }
+
+
+def paginar(titulos, offset, limite, filtro=None):
+    """
+    Aplica el filtro (conjunto de títulos permitidos) y corta la página.
+
+    Returns:
+        tuple: (títulos de la página, total tras filtrar)
+    """
+    if filtro is not None:
+        titulos = [t for t in titulos if t in filtro]
+    return titulos[offset:offset + limite], len(titulos)
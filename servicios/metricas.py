@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas de latencia y tráfico por ruta, en el formato de texto de Prometheus.
+
+Se activan con REVISTAS_METRICAS=1. Desactivadas no se registra ningún hook
+ni la ruta /metrics, así que no cuestan nada por petición.
+
+Cada petición se mide completa y repartida en fases:
+    carga   tiempo dentro de almacen.instantanea() (leer o recargar los datos)
+    render  tiempo renderizando plantillas de Jinja
+    filtro  el resto de la vista: índices, filtros, paginación, JSON y caché
+
+Las métricas se agrupan por endpoint de Flask (no por URL, para que el
+número de series no crezca con cada revista). Cada proceso lleva sus
+propias cuentas; con varios workers Prometheus debe consultar cada uno. En
+las respuestas en streaming (exportación) el tiempo llega hasta que se
+envían los encabezados y el tamaño no se conoce de antemano, así que no se
+registra.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from flask import Response, before_render_template, g, has_request_context, request, template_rendered
+
+# Límites superiores de los buckets, en segundos y en bytes
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BYTES = tuple(256 * 4 ** i for i in range(10))
+
+FASES = ('carga', 'filtro', 'render')
+
+TIPO_CONTENIDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histograma:
+    """Cuentas por bucket (no acumuladas), suma y total de observaciones."""
+
+    __slots__ = ('buckets', 'cuentas', 'suma', 'total')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # La última posición es el bucket +Inf
+        self.cuentas = [0] * (len(buckets) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.cuentas[bisect_left(self.buckets, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+
+def _etiquetas(pares):
+    # Prometheus pide escapar \, " y saltos de línea en los valores
+    return ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pares
+    )
+
+
+class Metricas:
+    """Registro de las métricas de un proceso de la aplicación web."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencia = {}
+        self.fases = {}
+        self.tamanos = {}
+        self.peticiones = {}
+
+    def _histograma(self, tabla, clave, buckets):
+        histograma = tabla.get(clave)
+        if histograma is None:
+            histograma = tabla[clave] = Histograma(buckets)
+        return histograma
+
+    def registrar(self, endpoint, metodo, codigo, duracion, fases, tamano):
+        """Guarda una petición terminada; fases es {fase: segundos}."""
+        with self._lock:
+            clave = (endpoint, metodo)
+            self._histograma(self.latencia, clave, BUCKETS_SEGUNDOS).observar(duracion)
+            for fase, segundos in fases.items():
+                self._histograma(self.fases, (endpoint, fase), BUCKETS_SEGUNDOS).observar(segundos)
+            if tamano is not None:
+                self._histograma(self.tamanos, clave, BUCKETS_BYTES).observar(tamano)
+            clave = (endpoint, metodo, codigo)
+            self.peticiones[clave] = self.peticiones.get(clave, 0) + 1
+
+    # Medición de las peticiones de Flask
+
+    def medir(self, fase):
+        """Decorador que suma a la fase el tiempo de la función, si hay una petición en curso."""
+        def decorador(funcion):
+            @wraps(funcion)
+            def envoltura(*args, **kwargs):
+                if not has_request_context() or 'metricas_fases' not in g:
+                    return funcion(*args, **kwargs)
+                inicio = time.perf_counter()
+                try:
+                    return funcion(*args, **kwargs)
+                finally:
+                    g.metricas_fases[fase] += time.perf_counter() - inicio
+            return envoltura
+        return decorador
+
+    def _antes(self):
+        g.metricas_inicio = time.perf_counter()
+        g.metricas_fases = dict.fromkeys(FASES, 0.0)
+
+    def _inicio_render(self, app, **_):
+        g.metricas_render = time.perf_counter()
+
+    def _fin_render(self, app, **_):
+        inicio = g.pop('metricas_render', None)
+        if inicio is not None and 'metricas_fases' in g:
+            g.metricas_fases['render'] += time.perf_counter() - inicio
+
+    def _despues(self, respuesta):
+        inicio = g.pop('metricas_inicio', None)
+        if inicio is None:
+            return respuesta
+        duracion = time.perf_counter() - inicio
+        fases = g.pop('metricas_fases')
+        fases['filtro'] = max(0.0, duracion - fases['carga'] - fases['render'])
+        # Las peticiones que no corresponden a ninguna ruta se juntan en una sola serie
+        endpoint = request.endpoint or 'sin_ruta'
+        tamano = None if respuesta.is_streamed else respuesta.content_length
+        self.registrar(endpoint, request.method, respuesta.status_code, duracion, fases, tamano)
+        return respuesta
+
+    def instalar(self, app, almacen, ruta='/metrics'):
+        """Registra los hooks de Flask, mide almacen.instantanea() y publica la ruta de métricas."""
+        almacen.instantanea = self.medir('carga')(almacen.instantanea)
+        app.before_request(self._antes)
+        app.after_request(self._despues)
+        before_render_template.connect(self._inicio_render, app, weak=False)
+        template_rendered.connect(self._fin_render, app, weak=False)
+        app.add_url_rule(ruta, 'metrics', lambda: Response(self.exposicion(), content_type=TIPO_CONTENIDO))
+
+    # Formato de texto de Prometheus
+
+    def _exponer_histograma(self, lineas, nombre, tabla, nombres_etiquetas):
+        for clave, histograma in sorted(tabla.items()):
+            etiquetas = _etiquetas(zip(nombres_etiquetas, clave))
+            acumulado = 0
+            for limite, cuenta in zip(histograma.buckets + ('+Inf',), histograma.cuentas):
+                acumulado += cuenta
+                lineas.append(f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+            lineas.append(f'{nombre}_sum{{{etiquetas}}} {histograma.suma!r}')
+            lineas.append(f'{nombre}_count{{{etiquetas}}} {histograma.total}')
+
+    def exposicion(self):
+        """Texto de todas las métricas en el formato de exposición de Prometheus."""
+        lineas = []
+        with self._lock:
+            lineas.append('# HELP revistas_http_requests_total Peticiones atendidas por endpoint, método y código.')
+            lineas.append('# TYPE revistas_http_requests_total counter')
+            for clave, total in sorted(self.peticiones.items()):
+                etiquetas = _etiquetas(zip(('endpoint', 'method', 'status'), clave))
+                lineas.append(f'revistas_http_requests_total{{{etiquetas}}} {total}')
+
+            lineas.append('# HELP revistas_http_request_duration_seconds Latencia de las peticiones.')
+            lineas.append('# TYPE revistas_http_request_duration_seconds histogram')
+            self._exponer_histograma(lineas, 'revistas_http_request_duration_seconds', self.latencia,
+                                     ('endpoint', 'method'))
+
+            lineas.append('# HELP revistas_http_request_phase_seconds Latencia por fase: carga, filtro y render.')
+            lineas.append('# TYPE revistas_http_request_phase_seconds histogram')
+            self._exponer_histograma(lineas, 'revistas_http_request_phase_seconds', self.fases,
+                                     ('endpoint', 'phase'))
+
+            lineas.append('# HELP revistas_http_response_size_bytes Tamaño del cuerpo de las respuestas.')
+            lineas.append('# TYPE revistas_http_response_size_bytes histogram')
+            self._exponer_histograma(lineas, 'revistas_http_response_size_bytes', self.tamanos,
+                                     ('endpoint', 'method'))
+        return '\n'.join(lineas) + '\n'
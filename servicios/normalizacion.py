@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Normalización de títulos de revistas compartida por el generador de JSON,
+el combinador de resultados y la búsqueda web.
+
+Hay dos niveles:
+
+- plegar_ascii: minúsculas, sin espacios en los extremos y sin acentos
+  (NFKD y solo ASCII). Es la clave de revistas.json.
+- normalizar: además reemplaza la puntuación por espacios y colapsa los
+  espacios. Es la que se usa para comparar títulos y para buscar.
+
+Las expresiones regulares se compilan una sola vez, los títulos que ya son
+ASCII no pasan por NFKD y ambos resultados se memorizan con un LRU, porque
+el mismo título se repite en varios CSV y en varios archivos de resultados.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+_NO_PALABRA = re.compile(r'[^\w\s]')
+_ESPACIOS = re.compile(r'\s+')
+
+# Suficiente para todos los títulos del catálogo (~42k) más las consultas
+TAMANO_CACHE = 1 << 17
+
+
+def _sin_acentos(texto):
+    if texto.isascii():
+        return texto
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def plegar_ascii(texto):
+    """Minúsculas, sin espacios en los extremos y sin acentos."""
+    return _sin_acentos(str(texto).lower().strip())
+
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def normalizar(texto):
+    """Normaliza un título para compararlo: sin acentos ni puntuación y con espacios simples."""
+    if not texto:
+        return ""
+    texto = _sin_acentos(str(texto).lower().strip())
+    texto = _NO_PALABRA.sub(' ', texto)
+    return _ESPACIOS.sub(' ', texto).strip()
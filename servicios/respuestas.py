@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+Caché HTTP de las respuestas de la aplicación web.
+
+Los datos solo cambian cuando se regeneran los archivos, así que cada
+respuesta lleva un ETag fuerte derivado de la versión de la instantánea (y
+del código, los servicios y las plantillas que la generan). Un navegador que ya la tiene
+recibe 304; si la página está en el caché no se vuelve a renderizar nada. El
+304 se responde solo cuando la página existe (está en el caché o la vista
+respondió 200), así que `If-None-Match: *` no lo obtiene para una ruta que la
+vista rechaza.
+
+Las páginas renderizadas se guardan en un LRU limitado en bytes, con clave
+ruta + argumentos, junto con su versión comprimida (gzip, o brotli si el
+paquete está instalado). Cuando cambia la versión de los datos el caché se
+vacía completo.
+
+DataTables agrega a cada petición `_` (un anti-caché de jQuery) y `draw` (un
+contador que la respuesta debe repetir). Ninguno cambia los datos, así que
+no forman parte de la clave: el cuerpo se guarda partido alrededor del valor
+de `draw` y se vuelve a armar con el de cada petición. Esos cuerpos se
+sirven con gzip: las partes de antes y después del valor se comprimen una
+vez como bloques deflate independientes y en cada petición solo se agrega
+el valor como bloque sin comprimir, la cabecera y el CRC.
+"""
+
+import gzip
+import hashlib
+import re
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from functools import wraps
+from pathlib import Path
+
+from flask import Response, make_response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Las respuestas más chicas que esto no se comprimen
+MIN_COMPRIMIR = 1024
+
+# Memoria máxima de las páginas guardadas (sin comprimir + comprimidas)
+MAX_BYTES_CACHE = 64 * 1024 * 1024
+
+# Segundos que el navegador puede reutilizar una respuesta sin revalidarla
+MAX_AGE = 60
+
+# Argumentos que no cambian el contenido de la respuesta
+ARGUMENTOS_IGNORADOS = frozenset({'_', 'draw'})
+
+# "draw" como clave de un objeto JSON; dentro de una cadena las comillas irían escapadas
+PATRON_DRAW = re.compile(rb'"draw": ?-?\d+')
+
+# Cabecera gzip (RFC 1952) sin nombre de archivo y con mtime=0, como gzip.compress
+CABECERA_GZIP = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+
+
+def version_codigo(base_dir):
+    """Huella del código, los servicios y las plantillas: cambia el ETag al desplegar otra versión."""
+    base_dir = Path(base_dir)
+    h = hashlib.sha1()
+    rutas = [base_dir / 'app.py']
+    # Los servicios arman las filas, el JSON y las exportaciones de las respuestas
+    rutas.extend(sorted((base_dir / 'servicios').glob('*.py')))
+    for carpeta in ('templates', 'static'):
+        rutas.extend(sorted(p for p in (base_dir / carpeta).rglob('*') if p.is_file()))
+    for ruta in rutas:
+        try:
+            h.update(str(ruta.relative_to(base_dir)).encode('utf-8'))
+            h.update(ruta.read_bytes())
+        except FileNotFoundError:
+            continue
+    return h.hexdigest()[:8]
+
+
+def comprimir(cuerpo, codificacion):
+    if codificacion == 'br':
+        return brotli.compress(cuerpo, quality=5)
+    # mtime=0: la misma página comprime siempre a los mismos bytes
+    return gzip.compress(cuerpo, compresslevel=6, mtime=0)
+
+
+def deflate(datos, final):
+    """
+    Bloques deflate crudos que no dependen de los datos anteriores. Si no son
+    los últimos, terminan con un vaciado completo (alineados a byte y sin
+    referencias al historial), así que se pueden concatenar con otros.
+    """
+    compresor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compresor.compress(datos) + compresor.flush(zlib.Z_FINISH if final else zlib.Z_FULL_FLUSH)
+
+
+def bloque_sin_comprimir(datos):
+    """Bloque deflate almacenado, no final (RFC 1951, 3.2.4); hasta 65535 bytes."""
+    return b'\x00' + struct.pack('<HH', len(datos), len(datos) ^ 0xFFFF) + datos
+
+
+class PaginaGuardada:
+    """
+    Cuerpo renderizado de una respuesta y sus versiones comprimidas.
+
+    Si el cuerpo repite el `draw` de DataTables se guarda partido en
+    (antes, después) del valor; de esas partes se guardan los bloques deflate
+    y el CRC de la primera, y solo se ofrece gzip.
+    """
+
+    __slots__ = ('cuerpo', 'content_type', 'comprimidos', 'partes_draw', 'gzip_draw')
+
+    def __init__(self, cuerpo, content_type, partes_draw=None):
+        self.cuerpo = cuerpo
+        self.content_type = content_type
+        self.comprimidos = {}
+        self.partes_draw = partes_draw
+        self.gzip_draw = None
+
+    @classmethod
+    def desde_respuesta(cls, respuesta):
+        cuerpo = respuesta.get_data()
+        if respuesta.is_json:
+            coincidencia = PATRON_DRAW.search(cuerpo)
+            if coincidencia is not None:
+                antes, despues = cuerpo[:coincidencia.start()], cuerpo[coincidencia.end():]
+                return cls(cuerpo, respuesta.content_type, (antes + b'"draw":', despues))
+        return cls(cuerpo, respuesta.content_type)
+
+    @property
+    def codificaciones(self):
+        """Codificaciones que se ofrecen, en orden de preferencia."""
+        return ('gzip',) if self.partes_draw is not None else ('br', 'gzip')
+
+    def tamano(self):
+        tamano = len(self.cuerpo) + sum(len(c) for c in self.comprimidos.values())
+        if self.gzip_draw is not None:
+            tamano += len(self.gzip_draw[0]) + len(self.gzip_draw[1])
+        return tamano
+
+    def con_draw(self, draw):
+        """Cuerpo con el `draw` de la petición actual."""
+        antes, despues = self.partes_draw
+        return antes + str(draw).encode('ascii') + despues
+
+    def gzip_con_draw(self, draw):
+        """Cuerpo con gzip y el `draw` de la petición; solo se comprime la primera vez."""
+        antes, despues = self.partes_draw
+        if self.gzip_draw is None:
+            self.gzip_draw = (deflate(antes, final=False), deflate(despues, final=True), zlib.crc32(antes))
+        comprimido_antes, comprimido_despues, crc = self.gzip_draw
+        valor = str(draw).encode('ascii')
+        crc = zlib.crc32(despues, zlib.crc32(valor, crc))
+        tamano = len(antes) + len(valor) + len(despues)
+        return b''.join((CABECERA_GZIP, comprimido_antes, bloque_sin_comprimir(valor), comprimido_despues,
+                         struct.pack('<II', crc, tamano & 0xFFFFFFFF)))
+
+    def codificado(self, codificacion, draw=0):
+        """Cuerpo en la codificación pedida; se comprime la primera vez y se conserva."""
+        if self.partes_draw is not None:
+            return self.con_draw(draw) if codificacion == 'identity' else self.gzip_con_draw(draw)
+        if codificacion == 'identity':
+            return self.cuerpo
+        cuerpo = self.comprimidos.get(codificacion)
+        if cuerpo is None:
+            cuerpo = self.comprimidos[codificacion] = comprimir(self.cuerpo, codificacion)
+        return cuerpo
+
+
+class CachePaginas:
+    """LRU de páginas renderizadas de una sola versión de los datos."""
+
+    def __init__(self, max_bytes=MAX_BYTES_CACHE):
+        self.max_bytes = max_bytes
+        self.version = None
+        self.bytes = 0
+        self._paginas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, version, clave):
+        with self._lock:
+            if version != self.version:
+                return None
+            pagina = self._paginas.get(clave)
+            if pagina is not None:
+                self._paginas.move_to_end(clave)
+            return pagina
+
+    def guardar(self, version, clave, pagina):
+        with self._lock:
+            if version != self.version:
+                # Datos nuevos: nada de lo guardado sigue siendo válido
+                self._paginas.clear()
+                self.bytes = 0
+                self.version = version
+            anterior = self._paginas.pop(clave, None)
+            if anterior is not None:
+                self.bytes -= anterior.tamano()
+            self._paginas[clave] = pagina
+            self.bytes += pagina.tamano()
+            while self.bytes > self.max_bytes and len(self._paginas) > 1:
+                _, descartada = self._paginas.popitem(last=False)
+                self.bytes -= descartada.tamano()
+
+    def actualizar_tamano(self, version, pagina, antes):
+        """Suma los bytes de una compresión hecha después de guardar la página."""
+        with self._lock:
+            if version == self.version:
+                self.bytes += pagina.tamano() - antes
+
+
+def codificacion_aceptada(tamano, disponibles=('br', 'gzip')):
+    """Una de las codificaciones disponibles o 'identity' según Accept-Encoding y el tamaño del cuerpo."""
+    if tamano < MIN_COMPRIMIR:
+        return 'identity'
+    aceptadas = request.accept_encodings
+    for codificacion in disponibles:
+        if aceptadas[codificacion] and (codificacion != 'br' or brotli is not None):
+            return codificacion
+    return 'identity'
+
+
+class RespuestasCacheadas:
+    """
+    Decorador de vistas: ETag, 304, compresión y caché de páginas.
+
+    Solo se guardan las respuestas 200; los errores pasan sin tocarse.
+    """
+
+    def __init__(self, almacen, version_codigo='', cache=None, max_age=MAX_AGE):
+        self.almacen = almacen
+        self.version_codigo = version_codigo
+        self.cache = cache if cache is not None else CachePaginas()
+        self.max_age = max_age
+
+    def etag(self, version, codificacion):
+        # Cada codificación es una representación distinta y lleva su propio ETag fuerte
+        etag = f'{version}-{self.version_codigo}'
+        return etag if codificacion == 'identity' else f'{etag}-{codificacion}'
+
+    def _encabezados(self, respuesta, etag):
+        respuesta.set_etag(etag)
+        respuesta.headers['Cache-Control'] = f'public, max-age={self.max_age}'
+        respuesta.vary.add('Accept-Encoding')
+        return respuesta
+
+    def __call__(self, vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            version = self.almacen.instantanea().version
+            clave = (request.path, tuple(sorted(
+                (k, v) for k, v in request.args.items(multi=True) if k not in ARGUMENTOS_IGNORADOS)))
+
+            pagina = self.cache.obtener(version, clave)
+            if pagina is None:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200 or respuesta.is_streamed:
+                    return respuesta
+                pagina = PaginaGuardada.desde_respuesta(respuesta)
+                self.cache.guardar(version, clave, pagina)
+
+            # La página existe: si el cliente ya la tiene en esta versión basta un 304
+            for codificacion in ('identity', 'gzip', 'br'):
+                etag = self.etag(version, codificacion)
+                if request.if_none_match.contains(etag):
+                    return self._encabezados(Response(status=304), etag)
+
+            codificacion = codificacion_aceptada(len(pagina.cuerpo), pagina.codificaciones)
+            etag = self.etag(version, codificacion)
+            antes = pagina.tamano()
+            cuerpo = pagina.codificado(codificacion, request.args.get('draw', 0, type=int))
+            if codificacion != 'identity' and pagina.tamano() != antes:
+                self.cache.actualizar_tamano(version, pagina, antes)
+            respuesta = Response(cuerpo, status=200, content_type=pagina.content_type)
+            if codificacion != 'identity':
+                respuesta.headers['Content-Encoding'] = codificacion
+            return self._encabezados(respuesta, etag)
+        return envoltura
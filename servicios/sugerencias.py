@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de autocompletado para el cuadro de búsqueda.
+
+Cada título normalizado aporta una clave por cada palabra, desde esa
+palabra hasta el final ("journal of materials", "of materials",
+"materials"), y las claves se guardan en un arreglo ordenado. Las claves que
+empiezan con lo que lleva escrito el usuario forman un rango contiguo que se
+localiza con bisect.
+
+Los ids de las revistas son su posición en el orden global por H-Index
+descendente, así que las mejores sugerencias de un rango son sus ids más
+chicos. Para los prefijos cortos, cuyo rango abarca miles de claves, las
+sugerencias se precalculan al construir el índice; los demás rangos son lo
+bastante chicos para recorrerlos en cada petición.
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+
+from servicios.normalizacion import normalizar
+
+# Sugerencias máximas por consulta
+MAX_SUGERENCIAS = 20
+
+# Los prefijos con más claves que esto se precalculan
+MAX_RANGO = 512
+
+
+class IndiceSugerencias:
+    """Claves ordenadas (sufijos de los títulos desde cada palabra) con ids por H-Index."""
+
+    def __init__(self, titulos_por_h):
+        self.titulos = list(titulos_por_h)
+        pares = []
+        for i, titulo in enumerate(self.titulos):
+            normalizado = normalizar(titulo)
+            inicio = 0
+            while inicio < len(normalizado):
+                pares.append((normalizado[inicio:], i))
+                espacio = normalizado.find(' ', inicio)
+                if espacio < 0:
+                    break
+                inicio = espacio + 1
+        pares.sort()
+        self.claves = [clave for clave, _ in pares]
+        self.ids = [i for _, i in pares]
+
+        self.precalculadas = {}
+        self._precalcular('', 0, len(self.claves))
+
+    def _mejores(self, lo, hi, n):
+        """Los n ids distintos más chicos (mayor H-Index) del rango de claves."""
+        return heapq.nsmallest(n, set(self.ids[lo:hi]))
+
+    def _precalcular(self, prefijo, lo, hi):
+        """Guarda las sugerencias del prefijo y de sus extensiones con rangos grandes."""
+        pendientes = [(prefijo, lo, hi)]
+        while pendientes:
+            prefijo, lo, hi = pendientes.pop()
+            self.precalculadas[prefijo] = self._mejores(lo, hi, MAX_SUGERENCIAS)
+            largo = len(prefijo)
+            # Las claves iguales al prefijo van primero; el resto se reparte
+            # por el siguiente carácter
+            lo = bisect_right(self.claves, prefijo, lo, hi)
+            while lo < hi:
+                siguiente = prefijo + self.claves[lo][largo]
+                fin = bisect_left(self.claves, siguiente + '\uffff', lo, hi)
+                if fin - lo > MAX_RANGO:
+                    pendientes.append((siguiente, lo, fin))
+                lo = fin
+
+    def sugerir(self, consulta, n=10):
+        """
+        Títulos con alguna palabra que empieza con la consulta, por H-Index.
+
+        Returns:
+            list: hasta n títulos, de mayor a menor H-Index
+        """
+        prefijo = normalizar(consulta)
+        if not prefijo:
+            return []
+        n = min(n, MAX_SUGERENCIAS)
+        precalculadas = self.precalculadas.get(prefijo)
+        if precalculadas is not None:
+            ids = precalculadas[:n]
+        else:
+            lo = bisect_left(self.claves, prefijo)
+            hi = bisect_left(self.claves, prefijo + '\uffff', lo)
+            ids = self._mejores(lo, hi, n)
+        return [self.titulos[i] for i in ids]
@@ -1,2 +1,102 @@
 // Archivo principal de JavaScript
 console.log('Sistema de Exploración de Revistas Científicas - UNISON');
+
+function escaparHtml(texto) {
+    return String(texto)
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#39;');
+}
+
+// Genera los badges de áreas o catálogos; urlBase contiene el marcador __VALOR__
+function badgesRevista(valores, urlBase) {
+    return valores.map(function(valor) {
+        var url = urlBase.replace('__VALOR__', encodeURIComponent(valor));
+        return '<a href="' + url + '" class="badge bg-secondary text-decoration-none me-1">' +
+               escaparHtml(valor) + '</a>';
+    }).join('');
+}
+
+// Tabla de revistas paginada, ordenada y filtrada en el servidor; después de
+// urlApi van uno o más pares (columna de badges, URL de sus enlaces)
+function tablaRevistasServidor(selector, urlApi, columnaBadges, urlBadges) {
+    var columnas = [
+        {
+            data: 'titulo',
+            render: function(titulo, tipo, fila) {
+                return '<a href="' + fila.url + '">' + escaparHtml(titulo) + '</a>';
+            }
+        },
+        {
+            data: 'h_index',
+            render: function(h) { return h === null ? 'N/A' : h; }
+        }
+    ];
+    for (var i = 2; i + 1 < arguments.length; i += 2) {
+        (function(columna, urlBase) {
+            columnas.push({
+                data: columna,
+                orderable: false,
+                render: function(valores) { return badgesRevista(valores, urlBase); }
+            });
+        })(arguments[i], arguments[i + 1]);
+    }
+    return $(selector).DataTable({
+        language: {
+            url: 'https://cdn.datatables.net/plug-ins/1.13.6/i18n/es-ES.json'
+        },
+        serverSide: true,
+        processing: true,
+        ajax: urlApi,
+        searchDelay: 300,
+        columns: columnas,
+        order: [[1, 'desc']], // Ordenar por H-Index descendente
+        pageLength: 25
+    });
+}
+
+// Autocompletado de los cuadros de búsqueda con /api/suggest; al elegir una
+// sugerencia se abre la página de la revista
+function autocompletarBusqueda(input, urlApi) {
+    var lista = document.createElement('datalist');
+    lista.id = 'sugerencias-' + Math.random().toString(36).slice(2);
+    input.setAttribute('list', lista.id);
+    input.setAttribute('autocomplete', 'off');
+    input.after(lista);
+
+    var urls = {};
+    var peticion = null;
+    var espera = null;
+
+    input.addEventListener('input', function(evento) {
+        var valor = input.value;
+        // Los navegadores sin inputType marcan así la elección de una opción
+        if (urls[valor] && (!evento.inputType || evento.inputType === 'insertReplacementText')) {
+            window.location.href = urls[valor];
+            return;
+        }
+        clearTimeout(espera);
+        if (valor.trim().length === 0) {
+            lista.innerHTML = '';
+            return;
+        }
+        espera = setTimeout(function() {
+            if (peticion) {
+                peticion.abort();
+            }
+            peticion = new AbortController();
+            fetch(urlApi + '?q=' + encodeURIComponent(valor), { signal: peticion.signal })
+                .then(function(respuesta) { return respuesta.json(); })
+                .then(function(datos) {
+                    urls = {};
+                    lista.innerHTML = datos.sugerencias.map(function(s) {
+                        urls[s.titulo] = s.url;
+                        return '<option value="' + escaparHtml(s.titulo) + '"></option>';
+                    }).join('');
+                })
+                .catch(function() {});
+        }, 80);
+    });
+}
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scraper'))
+
+from cola_trabajo import FALLIDO, ColaTrabajo  # noqa: E402
+
+
+def test_arrendamiento_vencido_respeta_max_intentos(tmp_path):
+    # Arrendamiento ya vencido al asignarse: simula un trabajador que se cuelga
+    cola = ColaTrabajo(str(tmp_path / 'cola.sqlite3'), duracion_lease=-1, max_intentos=2)
+    cola.sembrar([('revista', 0)])
+
+    arrendados = 0
+    for _ in range(5):
+        arrendados += len(cola.arrendar('trabajador'))
+
+    assert arrendados == 2
+    assert cola.resumen()[FALLIDO] == 1
+    assert cola.terminada()
+    cola.cerrar()
+
+
+def test_arrendamiento_vencido_se_reasigna_mientras_quedan_intentos(tmp_path):
+    cola = ColaTrabajo(str(tmp_path / 'cola.sqlite3'), duracion_lease=-1, max_intentos=3)
+    cola.sembrar([('revista', 0)])
+
+    assert cola.arrendar('a') == [('revista', 0)]
+    assert cola.arrendar('b') == [('revista', 0)]
+    assert cola.resumen()[FALLIDO] == 0
+    cola.cerrar()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import json
+import sys
+from pathlib import Path
+
+import chardet
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'utils'))
+
+import generar_json_revistas as g  # noqa: E402
+
+CSVS = sorted(p for directorio in g.DIRECTORIOS.values() for p in directorio.glob('*.csv'))
+
+
+def generar_fila_por_fila():
+    """Referencia: chardet sobre cada archivo completo y un recorrido fila por fila."""
+    revistas = {}
+    for columna, directorio in g.DIRECTORIOS.items():
+        lista = g.LISTAS[columna]
+        for csv_file in directorio.glob('*.csv'):
+            encoding = chardet.detect(csv_file.read_bytes())['encoding']
+            df = pd.read_csv(csv_file, encoding=encoding, names=['nombre_revista'])
+            df = df[df['nombre_revista'] != 'TITULO:']
+            valor = g.limpiar_nombre_area(csv_file.stem)
+            for nombre in df['nombre_revista']:
+                info = revistas.setdefault(g.limpiar_titulo(nombre), {'areas': [], 'catalogos': []})
+                if valor not in info[lista]:
+                    info[lista].append(valor)
+    return revistas
+
+
+@pytest.mark.parametrize('csv_file', CSVS, ids=lambda p: p.name)
+def test_detectar_encoding_decodifica_igual_que_chardet_completo(csv_file):
+    raw = csv_file.read_bytes()
+    detectado = g.detectar_encoding(raw)
+    completo = chardet.detect(raw)['encoding']
+    assert raw.decode(detectado) == raw.decode(completo)
+
+
+@pytest.mark.skipif(not CSVS, reason='sin CSV de áreas y catálogos')
+def test_revistas_json_no_cambia(tmp_path, monkeypatch):
+    monkeypatch.setattr(g, 'ENCODINGS_CACHE', tmp_path / '.encodings.json')
+    esperado = generar_fila_por_fila()
+    # Sin caché y después con las codificaciones ya guardadas
+    for _ in range(2):
+        revistas = g.construir_revistas(g.archivos_csv(g.DIRECTORIOS))[0]
+        assert list(revistas) == list(esperado)
+        assert revistas == esperado
+
+
+@pytest.mark.skipif(not CSVS, reason='sin CSV de áreas y catálogos')
+def test_incremental_igual_a_generacion_completa(tmp_path, monkeypatch):
+    directorios = {}
+    for columna, directorio in g.DIRECTORIOS.items():
+        destino = tmp_path / 'datos' / 'csv' / directorio.name
+        destino.mkdir(parents=True)
+        for csv_file in directorio.glob('*.csv'):
+            (destino / csv_file.name).write_bytes(csv_file.read_bytes())
+        directorios[columna] = destino
+    scimagojr = tmp_path / 'datos' / 'json' / 'revistas_scimagojr.json'
+    scimagojr.parent.mkdir(parents=True)
+    scimagojr.write_text('{}', encoding='utf-8')
+    monkeypatch.setattr(g, 'BASE_DIR', tmp_path)
+    monkeypatch.setattr(g, 'DIRECTORIOS', directorios)
+    monkeypatch.setattr(g, 'ENCODINGS_CACHE', tmp_path / '.encodings.json')
+    monkeypatch.setattr(g, 'OUTPUT_FILE', scimagojr.parent / 'revistas.json')
+    monkeypatch.setattr(g, 'MANIFEST_FILE', scimagojr.parent / 'revistas_manifest.json')
+    monkeypatch.setattr(g, 'SCIMAGOJR_FILE', scimagojr)
+    monkeypatch.setattr(g, 'REVISTAS_CATALOGO', tmp_path / 'datos' / 'revistas.catalogo')
+    g.procesar_y_generar_json()
+
+    catalogos = sorted(directorios['catalogo'].glob('*.csv'))
+    # Un archivo cambia (pierde filas y gana una revista), otro se agrega y otro se elimina
+    modificado = catalogos[0]
+    lineas = modificado.read_bytes().splitlines(keepends=True)
+    modificado.write_bytes(b''.join(lineas[:1] + lineas[50:]) + b'REVISTA DE PRUEBA INCREMENTAL\n')
+    (directorios['catalogo'] / 'NUEVO_RadGridExport.csv').write_bytes(
+        b'TITULO:\n' + b''.join(lineas[1:20]) + b'OTRA REVISTA DE PRUEBA\n')
+    catalogos[-1].unlink()
+
+    g.actualizar_incremental()
+    incremental = json.loads(g.OUTPUT_FILE.read_text(encoding='utf-8'))
+    completo = g.construir_revistas(g.archivos_csv(directorios))[0]
+    assert incremental == completo
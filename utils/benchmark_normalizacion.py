@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mide el costo por título de la normalización antes y después del módulo
+compartido servicios.normalizacion.
+
+Uso:
+    python utils/benchmark_normalizacion.py --repeticiones 3
+
+Se normalizan los títulos de revistas.json y revistas_scimagojr.json con la
+implementación original (re.sub con el patrón como cadena y NFKD en cada
+llamada), con la versión de patrones precompilados sin caché y con el LRU
+(primera pasada en frío y siguientes en caliente). También se compara la
+extracción del ID de SCImago de las URLs.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+from servicios.normalizacion import normalizar  # noqa: E402
+
+REVISTAS_JSON = BASE_DIR / 'datos' / 'json' / 'revistas.json'
+SCIMAGOJR_JSON = BASE_DIR / 'datos' / 'json' / 'revistas_scimagojr.json'
+
+ID_URL = re.compile(r'[?&]q=(\d+)&')
+
+
+def normalizar_original(title):
+    """ResultsCombiner.normalize_title tal como estaba."""
+    if not title:
+        return ""
+    title = str(title).lower().strip()
+    title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+    title = re.sub(r'[^\w\s]', ' ', title)
+    title = re.sub(r'\s+', ' ', title).strip()
+    return title
+
+
+def id_original(url):
+    id_match = re.search(r'[?&]q=(\d+)&', url)
+    return id_match.group(1) if id_match else None
+
+
+def id_precompilado(url):
+    id_match = ID_URL.search(url)
+    return id_match.group(1) if id_match else None
+
+
+def medir(funcion, valores, repeticiones):
+    """Devuelve (microsegundos por valor, resultados de la última repetición)."""
+    resultados = []
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultados = [funcion(v) for v in valores]
+    return (time.perf_counter() - inicio) * 1e6 / (repeticiones * len(valores)), resultados
+
+
+def cargar(ruta):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la normalización de títulos')
+    parser.add_argument('--repeticiones', type=int, default=3, help='Pasadas sobre todos los títulos (default: 3)')
+    args = parser.parse_args()
+
+    revistas = cargar(REVISTAS_JSON)
+    scimagojr = cargar(SCIMAGOJR_JSON)
+    # Los mismos títulos aparecen en ambos archivos, como al combinar resultados
+    titulos = list(revistas) + list(scimagojr)
+    urls = [info['url'] for info in scimagojr.values() if isinstance(info, dict) and info.get('url')]
+    if not titulos:
+        print(f"No hay títulos en {REVISTAS_JSON} ni en {SCIMAGOJR_JSON}")
+        sys.exit(1)
+    print(f"Títulos: {len(titulos)} ({len(set(titulos))} distintos), URLs: {len(urls)}")
+
+    base, referencia = medir(normalizar_original, titulos, args.repeticiones)
+    print(f"{'original':>22}: {base:6.2f} µs/título")
+
+    sin_cache, resultados = medir(normalizar.__wrapped__, titulos, args.repeticiones)
+    print(f"{'precompilada':>22}: {sin_cache:6.2f} µs/título ({base / sin_cache:.1f}x)")
+
+    normalizar.cache_clear()
+    frio, _ = medir(normalizar, titulos, 1)
+    print(f"{'LRU, primera pasada':>22}: {frio:6.2f} µs/título ({base / frio:.1f}x)")
+    caliente, resultados_cache = medir(normalizar, titulos, args.repeticiones)
+    print(f"{'LRU, en caliente':>22}: {caliente:6.2f} µs/título ({base / caliente:.1f}x)")
+
+    diferencias = sum(1 for a, b, c in zip(referencia, resultados, resultados_cache) if not a == b == c)
+    print(f"Títulos normalizados distinto a la versión original: {diferencias}")
+
+    if urls:
+        base_id, ids = medir(id_original, urls, args.repeticiones)
+        rapido_id, ids_rapido = medir(id_precompilado, urls, args.repeticiones)
+        print(f"ID de la URL: {base_id:.2f} µs original, {rapido_id:.2f} µs precompilada "
+              f"({sum(1 for a, b in zip(ids, ids_rapido) if a != b)} diferencias)")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,14 +5,25 @@ import json
 import argparse
 from pathlib import Path
 import os
-import unicodedata
+import sys
+import tempfile
 import re
 
+# La normalización de títulos vive en el paquete servicios de la aplicación
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from servicios.normalizacion import normalizar, plegar_ascii  # noqa: E402
+
+# ID de SCImago dentro de la URL de la revista
+ID_URL = re.compile(r'[?&]q=(\d+)&')
+
 class ResultsCombiner:
 
     def __init__(self):
         """Inicializa el combinador de resultados."""
         self.combined_results = {}
+        # Archivo (1, 2, ...) del que viene cada revista; None si aparece en varios
+        self.sources = {}
+        self.file_count = 0
         self.stats = {
             "total_combined": 0,
             "conflicts": 0,
@@ -24,13 +35,7 @@ class ResultsCombiner:
 
     def normalize_title(self, title):
         """Normaliza un título para comparación."""
-        if not title:
-            return ""
-        title = str(title).lower().strip()
-        title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
-        title = re.sub(r'[^\w\s]', ' ', title)
-        title = re.sub(r'\s+', ' ', title).strip()
-        return title
+        return normalizar(title)
 
     def load_json(self, file_path):
         """Carga un archivo JSON y devuelve su contenido."""
@@ -95,6 +100,109 @@ class ResultsCombiner:
         
         return combined
 
+    def extract_id(self, entry):
+        """Agrega a la entrada el ID de SCImago que aparece en su URL."""
+        if entry.get('url'):
+            id_match = ID_URL.search(entry['url'])
+            if id_match:
+                entry['id'] = id_match.group(1)
+        return entry
+
+    def iter_entries(self, file_path):
+        """
+        Recorre las entradas (título, datos) de un archivo de resultados.
+
+        Los .jsonl (bitácora del scraper, un registro {"titulo", "datos"} por
+        línea) se leen línea por línea sin cargar el archivo completo; los
+        .json se cargan completos porque el formato no permite leerlos por
+        partes sin dependencias extra.
+        """
+        if str(file_path).endswith('.jsonl'):
+            count = 0
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Línea truncada por un corte abrupto del scraper
+                        continue
+                    count += 1
+                    yield record['titulo'], record['datos']
+            print(f"Leídos {count} registros de {file_path}")
+        else:
+            yield from self.load_json(file_path).items()
+
+    def add_entry(self, journal_title, entry, file_index):
+        """Incorpora una entrada del archivo número file_index al resultado combinado."""
+        entry = self.extract_id(entry)
+        current = self.combined_results.get(journal_title)
+        if current is None or self.sources.get(journal_title) == file_index:
+            # Revista nueva, o repetida dentro de la misma bitácora: vale la última
+            self.combined_results[journal_title] = entry
+            self.sources[journal_title] = file_index
+            return
+
+        self.sources[journal_title] = None
+
+        # Verificar si hay conflicto (información diferente para la misma revista)
+        if (current.get('id') != entry.get('id') or
+            current.get('title') != entry.get('title')):
+            self.stats["conflicts"] += 1
+            if self.is_better_match(current, entry) != 0:
+                self.stats["conflict_resolution"] += 1
+                self.stats["better_matches"] += 1
+
+        self.combined_results[journal_title] = self.merge_metadata(current, entry)
+
+    def save_results(self, output_path, indent=2):
+        """Escribe el resultado combinado con un renombrado atómico."""
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=output_file.parent)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                # json.dump escribe por partes; sin indentación usa el codificador en C
+                json.dump(self.combined_results, f, ensure_ascii=False, indent=indent)
+            os.replace(temp_path, output_file)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        print(f"Archivo combinado guardado en: {output_file}")
+
+    def combine_many(self, file_paths, output_path, indent=2):
+        """
+        Combina cualquier número de archivos de resultados en una sola pasada.
+
+        Los archivos se leen de uno en uno y se incorporan al resultado, así
+        que en memoria solo están el resultado y el archivo en curso. Ante la
+        misma revista en varios archivos se usan is_better_match y
+        merge_metadata, igual que al combinar dos archivos.
+
+        Args:
+            file_paths: Rutas a los archivos JSON o JSONL, en orden de prioridad
+            output_path: Ruta donde guardar el archivo combinado
+            indent: Indentación del JSON de salida (None para el formato compacto)
+        """
+        file_paths = list(file_paths)
+        print(f"Combinando resultados de {len(file_paths)} archivos...")
+        self.file_count = len(file_paths)
+        for file_index, file_path in enumerate(file_paths, start=1):
+            self.stats.setdefault(f"added_from_file{file_index}", 0)
+            for journal_title, entry in self.iter_entries(file_path):
+                self.add_entry(journal_title, entry, file_index)
+
+        # Revistas que solo aparecen en un archivo
+        for file_index in self.sources.values():
+            if file_index is not None:
+                self.stats[f"added_from_file{file_index}"] += 1
+
+        # Actualizar estadísticas
+        self.stats["total_combined"] = len(self.combined_results)
+
+        self.save_results(output_path, indent)
+        self.print_stats()
+
     def combine_results(self, file1_path, file2_path, output_path):
         """
         Combina los resultados de dos archivos JSON en uno solo.
@@ -104,76 +212,14 @@ class ResultsCombiner:
             file2_path: Ruta al segundo archivo JSON
             output_path: Ruta donde guardar el archivo combinado
         """
-        print(f"Combinando resultados de {file1_path} y {file2_path}...")
-        
-        # Cargar ambos archivos
-        results1 = self.load_json(file1_path)
-        results2 = self.load_json(file2_path)
-        
-        # Extraer IDs de las URLs para ambos conjuntos de resultados
-        for results in [results1, results2]:
-            for journal_name, entry in results.items():
-                if entry.get('url'):
-                    # Buscar el ID en la URL usando una expresión regular
-                    url = entry['url']
-                    id_match = re.search(r'[?&]q=(\d+)&', url)
-                    if id_match:
-                        entry['id'] = id_match.group(1)
-        
-        # Iniciar el proceso de combinación
-        for journal_title, entry1 in results1.items():
-            normalized_title = self.normalize_title(journal_title)
-            
-            # Si la revista no está en el segundo archivo, agregar directamente
-            if journal_title not in results2:
-                self.combined_results[journal_title] = entry1
-                self.stats["added_from_file1"] += 1
-                continue
-                
-            # Si la revista está en ambos archivos
-            entry2 = results2[journal_title]
-            
-            # Verificar si hay conflicto (información diferente para la misma revista)
-            if (entry1.get('id') != entry2.get('id') or 
-                entry1.get('title') != entry2.get('title')):
-                self.stats["conflicts"] += 1
-                
-                # Determinar cuál es mejor y combinar metadatos
-                better_result = self.is_better_match(entry1, entry2)
-                if better_result != 0:
-                    self.stats["conflict_resolution"] += 1
-                    self.stats["better_matches"] += 1
-                    
-                self.combined_results[journal_title] = self.merge_metadata(entry1, entry2)
-            else:
-                # No hay conflicto, solo combinar metadatos
-                self.combined_results[journal_title] = self.merge_metadata(entry1, entry2)
-        
-        # Agregar revistas que solo están en el segundo archivo
-        for journal_title, entry2 in results2.items():
-            if journal_title not in self.combined_results:
-                self.combined_results[journal_title] = entry2
-                self.stats["added_from_file2"] += 1
-        
-        # Actualizar estadísticas
-        self.stats["total_combined"] = len(self.combined_results)
-        
-        # Guardar el resultado combinado
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.combined_results, f, ensure_ascii=False, indent=2)
-        
-        print(f"Archivo combinado guardado en: {output_file}")
-        self.print_stats()
+        self.combine_many([file1_path, file2_path], output_path)
     
     def print_stats(self):
         """Imprime estadísticas del proceso de combinación."""
         print("\n=== Estadísticas de combinación ===")
         print(f"Total de revistas en archivo combinado: {self.stats['total_combined']}")
-        print(f"Revistas agregadas solo del archivo 1: {self.stats['added_from_file1']}")
-        print(f"Revistas agregadas solo del archivo 2: {self.stats['added_from_file2']}")
+        for file_index in range(1, max(self.file_count, 2) + 1):
+            print(f"Revistas agregadas solo del archivo {file_index}: {self.stats.get(f'added_from_file{file_index}', 0)}")
         print(f"Conflictos encontrados: {self.stats['conflicts']}")
         print(f"Conflictos resueltos: {self.stats['conflict_resolution']}")
         print(f"Entradas con mejor coincidencia seleccionada: {self.stats['better_matches']}")
@@ -196,8 +242,7 @@ def analyze_json_content(file_path):
         for journal_name, entry in data.items():
             if entry.get('url'):
                 # Buscar el ID en la URL usando una expresión regular
-                url = entry['url']
-                id_match = re.search(r'[?&]q=(\d+)&', url)
+                id_match = ID_URL.search(entry['url'])
                 if id_match:
                     entry['id'] = id_match.group(1)
         
@@ -217,7 +262,7 @@ def analyze_json_content(file_path):
                     titles[title] = 1
                     
                 # Normalizar y verificar duplicados normalizados
-                normalized = unicodedata.normalize('NFKD', title.lower()).encode('ascii', 'ignore').decode('ascii')
+                normalized = plegar_ascii(title)
                 if normalized in normalized_titles:
                     normalized_titles[normalized].append(journal_name)
                 else:
@@ -257,31 +302,30 @@ def analyze_json_content(file_path):
         return None
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='Combina resultados de scraping de dos archivos JSON.')
-    parser.add_argument('file1', help='Ruta al primer archivo JSON')
-    parser.add_argument('file2', help='Ruta al segundo archivo JSON')
+    parser = argparse.ArgumentParser(description='Combina resultados de scraping de varios archivos JSON o JSONL.')
+    parser.add_argument('files', nargs='+', help='Archivos a combinar, en orden de prioridad')
     parser.add_argument('--output', '-o', default='revistas_combined.json', help='Ruta para el archivo combinado')
     parser.add_argument('--analyze', '-a', action='store_true', help='Solo analizar contenido, sin combinar')
+    parser.add_argument('--compact', '-c', action='store_true', help='Escribir el JSON sin indentación (más rápido)')
     
     args = parser.parse_args()
     
     # Asegurar rutas absolutas o relativas correctas
-    file1_path = Path(args.file1)
-    file2_path = Path(args.file2)
+    file_paths = [Path(f) for f in args.files]
     output_path = Path(args.output)
     
-    if not file1_path.exists():
-        print(f"Error: No se encuentra el archivo {file1_path}")
-        exit(1)
-    
-    if not file2_path.exists():
-        print(f"Error: No se encuentra el archivo {file2_path}")
-        exit(1)
+    for file_path in file_paths:
+        if not file_path.exists():
+            print(f"Error: No se encuentra el archivo {file_path}")
+            exit(1)
     
     if args.analyze:
         print("Modo análisis: solo se mostrarán estadísticas sin combinar archivos")
-        analyze_json_content(file1_path)
-        analyze_json_content(file2_path)
+        for file_path in file_paths:
+            analyze_json_content(file_path)
     else:
+        if len(file_paths) < 2:
+            print("Error: Se necesitan al menos dos archivos para combinar")
+            exit(1)
         combiner = ResultsCombiner()
-        combiner.combine_results(file1_path, file2_path, output_path)
+        combiner.combine_many(file_paths, output_path, indent=None if args.compact else 2)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Empareja en bloque los títulos de revistas.json con registros de SCImago
+por similitud, sin depender de la página de búsqueda de SCImago.
+
+1. Coincidencia exacta del título normalizado (similitud 1.0).
+2. Bloqueo: cada título solo se compara con los candidatos que comparten
+   alguna de sus palabras menos frecuentes, así que no se evalúan los
+   N×M pares.
+3. Puntaje: Jaccard de trigramas de los títulos normalizados. Antes de
+   calcularlo se descartan los candidatos cuyo número de trigramas hace
+   imposible alcanzar el umbral.
+
+El resultado tiene el mismo formato que revistas_scimagojr.json, con los
+campos 'title' (título en SCImago) y 'similarity' que ResultsCombiner usa
+para elegir la mejor entrada, así que se puede combinar con lo extraído
+por el scraper:
+
+    python utils/emparejar_titulos.py --candidatos scimago.json -o similares.json
+    python utils/combine_results.py datos/json/revistas_scimagojr.json similares.json -o combinado.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+from servicios.busqueda import trigramas  # noqa: E402
+from servicios.normalizacion import normalizar  # noqa: E402
+
+REVISTAS_JSON = BASE_DIR / 'datos' / 'json' / 'revistas.json'
+
+# Similitud mínima para aceptar un emparejamiento
+UMBRAL = 0.8
+
+# Palabras menos frecuentes del título que se usan para buscar candidatos
+PALABRAS_BLOQUE = 3
+
+# Las palabras que aparecen en más candidatos que esto ("journal", "of",
+# "revista"...) no sirven para bloquear, salvo que el título no tenga otras
+MAX_FRECUENCIA = 2000
+
+# Títulos que cada proceso empareja por tarea
+TAMANO_LOTE = 2000
+
+
+def trigramas_titulo(normalizado):
+    """Trigramas del título con espacios en los extremos (cuentan inicio y fin de palabra)."""
+    return frozenset(trigramas(' ' + normalizado + ' '))
+
+
+class EmparejadorTitulos:
+    """Índice de los títulos candidatos para emparejar por similitud."""
+
+    def __init__(self, candidatos, umbral=UMBRAL, palabras_bloque=PALABRAS_BLOQUE,
+                 max_frecuencia=MAX_FRECUENCIA):
+        self.titulos = list(candidatos)
+        self.umbral = umbral
+        self.palabras_bloque = palabras_bloque
+        self.max_frecuencia = max_frecuencia
+
+        normalizados = [normalizar(t) for t in self.titulos]
+        self.exactos = {}
+        for i, norm in enumerate(normalizados):
+            self.exactos.setdefault(norm, i)
+        self.trigramas = [trigramas_titulo(norm) for norm in normalizados]
+
+        palabras = defaultdict(list)
+        for i, norm in enumerate(normalizados):
+            for palabra in set(norm.split()):
+                palabras[palabra].append(i)
+        self.palabras = {p: array('I', ids) for p, ids in palabras.items()}
+
+    def candidatos(self, normalizado):
+        """Ids de los candidatos que comparten alguna palabra poco frecuente con el título."""
+        listas = sorted((self.palabras[p] for p in set(normalizado.split()) if p in self.palabras), key=len)
+        if not listas:
+            return set()
+        utiles = [lista for lista in listas[:self.palabras_bloque] if len(lista) <= self.max_frecuencia]
+        ids = set()
+        for lista in utiles or listas[:1]:
+            ids.update(lista)
+        return ids
+
+    def emparejar(self, titulo):
+        """
+        Mejor candidato para el título.
+
+        Returns:
+            tuple: (título candidato, similitud) o None si ninguno alcanza el umbral
+        """
+        normalizado = normalizar(titulo)
+        if not normalizado:
+            return None
+        exacto = self.exactos.get(normalizado)
+        if exacto is not None:
+            return self.titulos[exacto], 1.0
+
+        propios = trigramas_titulo(normalizado)
+        n = len(propios)
+        minimo, maximo = n * self.umbral, n / self.umbral
+        mejor, mejor_similitud = None, self.umbral
+        for i in self.candidatos(normalizado):
+            otros = self.trigramas[i]
+            m = len(otros)
+            # Jaccard <= min(n, m) / max(n, m): si ya no alcanza, no se calcula
+            if m < minimo or m > maximo:
+                continue
+            comunes = len(propios & otros)
+            similitud = comunes / (n + m - comunes)
+            if similitud > mejor_similitud or (similitud == mejor_similitud and mejor is None):
+                mejor, mejor_similitud = i, similitud
+        if mejor is None:
+            return None
+        return self.titulos[mejor], mejor_similitud
+
+    def emparejar_lote(self, titulos):
+        return [(titulo, self.emparejar(titulo)) for titulo in titulos]
+
+
+# Emparejador de cada proceso trabajador, recibido una sola vez al iniciar
+_emparejador = None
+
+
+def _iniciar_proceso(emparejador):
+    global _emparejador
+    _emparejador = emparejador
+
+
+def _emparejar_lote(titulos):
+    return _emparejador.emparejar_lote(titulos)
+
+
+def emparejar_todos(emparejador, titulos, procesos=None):
+    """{título: (candidato, similitud)} de los títulos que alcanzan el umbral, en paralelo."""
+    titulos = list(titulos)
+    lotes = [titulos[i:i + TAMANO_LOTE] for i in range(0, len(titulos), TAMANO_LOTE)]
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1 or len(lotes) <= 1:
+        resultados = [emparejador.emparejar_lote(lote) for lote in lotes]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                                 initargs=(emparejador,)) as pool:
+            resultados = list(pool.map(_emparejar_lote, lotes))
+    return {titulo: par for lote in resultados for titulo, par in lote if par is not None}
+
+
+def cargar_candidatos(ruta):
+    """Registros de SCImago como {título: registro}; acepta un dict o una lista con 'title'."""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    if isinstance(datos, list):
+        return {registro['title']: registro for registro in datos if registro.get('title')}
+    return datos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Empareja títulos de revistas con registros de SCImago por similitud')
+    parser.add_argument('--candidatos', required=True,
+                        help='JSON con los registros de SCImago ({título: registro} o lista con "title")')
+    parser.add_argument('--titulos', default=REVISTAS_JSON, help='JSON cuyas claves son los títulos a emparejar')
+    parser.add_argument('--existentes', help='JSON de resultados; sus títulos no se vuelven a emparejar')
+    parser.add_argument('--output', '-o', required=True, help='Ruta del JSON con los emparejamientos')
+    parser.add_argument('--umbral', type=float, default=UMBRAL, help=f'Similitud mínima (default: {UMBRAL})')
+    parser.add_argument('--procesos', type=int, help='Procesos en paralelo (default: número de CPUs)')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    candidatos = cargar_candidatos(args.candidatos)
+    with open(args.titulos, 'r', encoding='utf-8') as f:
+        titulos = list(json.load(f))
+    if args.existentes:
+        with open(args.existentes, 'r', encoding='utf-8') as f:
+            existentes = json.load(f)
+        titulos = [t for t in titulos if t not in existentes]
+
+    emparejador = EmparejadorTitulos(candidatos, umbral=args.umbral)
+    print(f"Índice de {len(candidatos)} candidatos en {time.perf_counter() - inicio:.2f} s; "
+          f"emparejando {len(titulos)} títulos...")
+
+    inicio_emparejado = time.perf_counter()
+    pares = emparejar_todos(emparejador, titulos, args.procesos)
+    exactos = sum(1 for _, similitud in pares.values() if similitud == 1.0)
+
+    resultado = {}
+    for titulo, (candidato, similitud) in pares.items():
+        registro = candidatos[candidato]
+        resultado[titulo] = dict(registro if isinstance(registro, dict) else {},
+                                 title=candidato, similarity=round(similitud, 4))
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    print(f"Emparejados: {len(pares)} de {len(titulos)} ({exactos} exactos, {len(pares) - exactos} por similitud) "
+          f"en {time.perf_counter() - inicio_emparejado:.2f} s")
+    print(f"Archivo guardado en: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
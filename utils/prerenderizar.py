@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Genera versiones estáticas de las páginas de navegación para servirlas con
+nginx (o un CDN) sin pasar por Flask.
+
+Las páginas son finitas y solo cambian al regenerar los datos: inicio,
+créditos, /areas, /catalogos, cada área, cada catálogo, /explorar con cada
+letra y una página por revista. Se renderizan con las mismas vistas y
+plantillas de app.py, repartidas en varios procesos.
+
+Cada página se escribe como <ruta>.html (la de inicio como index.html). El
+manifiesto guarda el SHA-1 de cada página: las que no cambiaron no se
+vuelven a escribir (conservan su fecha, así que rsync o el CDN no las
+vuelven a subir) y las que ya no existen se borran.
+
+Uso:
+    python utils/prerenderizar.py -o datos/estatico --gzip
+
+Configuración de nginx (Flask atiende /buscar, /api, /exportar y lo que
+no esté generado):
+
+    location / {
+        root /ruta/datos/estatico;
+        gzip_static on;
+        try_files $uri.html $uri/index.html @flask;
+    }
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+import app as aplicacion  # noqa: E402
+
+SALIDA_DIR = BASE_DIR / 'datos' / 'estatico'
+MANIFIESTO = 'manifiesto.json'
+
+# Páginas que cada proceso renderiza por tarea
+TAMANO_LOTE = 500
+
+# Las páginas más chicas que esto no se guardan comprimidas
+MIN_COMPRIMIR = 1024
+
+# Longitud máxima de un nombre de archivo en la mayoría de los sistemas
+MAX_NOMBRE = 255
+
+
+def paginas():
+    """(endpoint, argumentos) de todas las páginas que se generan."""
+    instantanea = aplicacion.almacen.instantanea()
+    indices = instantanea.indices
+    yield 'index', {}
+    yield 'creditos', {}
+    yield 'areas', {}
+    yield 'catalogos', {}
+    yield 'explorar', {}
+    for area in indices.areas:
+        yield 'area_detalle', {'area': area}
+    for catalogo in indices.catalogos:
+        yield 'catalogo_detalle', {'catalogo': catalogo}
+    for letra in aplicacion.LETRAS:
+        yield 'explorar_letra', {'letra': letra}
+    for titulo in instantanea.revistas:
+        yield 'revista_detalle', {'titulo': titulo}
+
+
+def archivo_ruta(ruta):
+    """'/area/ING' -> 'area/ING.html'; None si la ruta no se puede guardar como archivo."""
+    partes = unquote(ruta).strip('/').split('/')
+    if partes == ['']:
+        return 'index.html'
+    if any(p in ('', '.', '..') or len(p.encode('utf-8')) + 5 > MAX_NOMBRE for p in partes):
+        return None
+    return '/'.join(partes) + '.html'
+
+
+def escribir_atomico(destino, contenido):
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix='.tmp_', dir=destino.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contenido)
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, destino)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def renderizar(endpoint, argumentos, ruta):
+    """Cuerpo HTML de la página, llamando a la vista sin pasar por el caché de respuestas."""
+    vista = aplicacion.app.view_functions[endpoint]
+    vista = getattr(vista, '__wrapped__', vista)
+    with aplicacion.app.test_request_context(ruta):
+        return aplicacion.app.make_response(vista(**argumentos)).get_data()
+
+
+# Configuración de cada proceso trabajador
+_salida = None
+_comprimir = False
+
+
+def _iniciar_proceso(salida, comprimir):
+    global _salida, _comprimir
+    _salida = Path(salida)
+    _comprimir = comprimir
+
+
+def _renderizar_lote(lote):
+    """Renderiza un lote de (endpoint, argumentos, ruta, archivo, hash anterior) y escribe lo que cambió."""
+    resultados = []
+    for endpoint, argumentos, ruta, archivo, anterior in lote:
+        cuerpo = renderizar(endpoint, argumentos, ruta)
+        huella = hashlib.sha1(cuerpo).hexdigest()
+        destino = _salida / archivo
+        cambio = anterior != huella or not destino.exists()
+        if cambio:
+            escribir_atomico(destino, cuerpo)
+        comprimido = destino.with_name(destino.name + '.gz')
+        if _comprimir and len(cuerpo) >= MIN_COMPRIMIR:
+            if cambio or not comprimido.exists():
+                escribir_atomico(comprimido, gzip.compress(cuerpo, compresslevel=9, mtime=0))
+        elif cambio and comprimido.exists():
+            # Un .gz de la versión anterior haría que nginx sirviera la página vieja
+            comprimido.unlink()
+        resultados.append((archivo, huella, cambio))
+    return resultados
+
+
+def cargar_manifiesto(salida):
+    try:
+        with open(salida / MANIFIESTO, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera las páginas estáticas del sitio')
+    parser.add_argument('--output', '-o', default=SALIDA_DIR, help=f'Directorio de salida (default: {SALIDA_DIR})')
+    parser.add_argument('--procesos', type=int, help='Procesos en paralelo (default: número de CPUs)')
+    parser.add_argument('--gzip', action='store_true', help='Guardar también <página>.html.gz para gzip_static')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    salida = Path(args.output)
+    salida.mkdir(parents=True, exist_ok=True)
+    anteriores = cargar_manifiesto(salida)
+
+    # Cada tarea lleva su ruta, su archivo y el hash que tenía la página
+    tareas = []
+    omitidas = []
+    with aplicacion.app.test_request_context():
+        for endpoint, argumentos in paginas():
+            ruta = aplicacion.url_for(endpoint, **argumentos)
+            archivo = archivo_ruta(ruta)
+            if archivo is None:
+                omitidas.append(ruta)
+            else:
+                tareas.append((endpoint, argumentos, ruta, archivo, anteriores.get(archivo)))
+    lotes = [tareas[i:i + TAMANO_LOTE] for i in range(0, len(tareas), TAMANO_LOTE)]
+    print(f"Páginas: {len(tareas)} en {len(lotes)} lotes")
+
+    procesos = args.procesos or os.cpu_count() or 1
+    if procesos == 1 or len(lotes) <= 1:
+        _iniciar_proceso(salida, args.gzip)
+        resultados = [_renderizar_lote(lote) for lote in lotes]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                                 initargs=(str(salida), args.gzip)) as pool:
+            resultados = list(pool.map(_renderizar_lote, lotes))
+
+    manifiesto = {}
+    escritas = 0
+    for lote in resultados:
+        for archivo, huella, cambio in lote:
+            manifiesto[archivo] = huella
+            escritas += cambio
+
+    # Páginas que ya no existen (revistas que salieron de los datos)
+    borradas = 0
+    for archivo in set(anteriores) - set(manifiesto):
+        for ruta in (salida / archivo, salida / (archivo + '.gz')):
+            if ruta.exists():
+                ruta.unlink()
+        borradas += 1
+
+    escribir_atomico(salida / MANIFIESTO,
+                     json.dumps(manifiesto, ensure_ascii=False, indent=1).encode('utf-8'))
+
+    print(f"Escritas: {escritas}, sin cambios: {len(manifiesto) - escritas}, borradas: {borradas}")
+    for ruta in omitidas:
+        print(f"Sin archivo estático, la atiende Flask: {ruta[:120]}")
+    print(f"Directorio: {salida} ({time.perf_counter() - inicio:.1f} s)")
+
+
+if __name__ == '__main__':
+    main()